@@ -62,11 +62,13 @@ class DeploymentInitHelper:
         self._rebuild_filters.append(msgpack.Unpacker.FILTER_DONE)
         return self
 
-    def init_logging(self, logs_dir: str, log_filter: msgabc.Filter) -> DeploymentInitHelper:
+    def init_logging(self, logs_dir: str, log_filter: msgabc.Filter,
+                     max_size: int = 16777216, compress: str = 'gz', retain: int = 20) -> DeploymentInitHelper:
         roll_filter = msgftr.Or(mc.ServerStatus.RUNNING_FALSE_FILTER, msgftr.And(
             httpext.WipeHandler.FILTER_DONE, msgftr.DataStrStartsWith(logs_dir, invert=True)))
         self._context.register(msglog.LogfileSubscriber(
-            logs_dir + '/%Y%m%d-%H%M%S.log', log_filter, roll_filter, msgtrf.GetData()))
+            logs_dir + '/%Y%m%d-%H%M%S.log', log_filter, roll_filter, msgtrf.GetData(),
+            max_size=max_size, compress=compress, retain=retain, index_interval=10.0))
         return self
 
     def done(self):
@@ -177,8 +179,11 @@ class DeploymentResourceBuilder:
         return self.put('log', httpext.FileSystemHandler(log_file))
 
     def put_logs(self, logs_dir: str, ls_filter: typing.Callable = None) -> DeploymentResourceBuilder:
-        self.psh('logs', httpext.FileSystemHandler(logs_dir, ls_filter=ls_filter))
+        self.psh('logs', httpext.FileSystemHandler(logs_dir, ls_filter=_ls_without_index(ls_filter)))
         self.put('*{path}', httpext.FileSystemHandler(logs_dir, 'path'), 'r')
+        self.pop()
+        self.psh('logsearch')
+        self.put('*{path}', httpext.LogSearchHandler(logs_dir, 'path'), 'r')
         return self.pop()
 
     def put_backups(self, tempdir: str, backups_dir: str) -> DeploymentResourceBuilder:
@@ -240,3 +245,11 @@ class ConsoleResourceBuilder:
 
     def put_say_pipein(self, formatter: prcext.SayFormatter | str) -> ConsoleResourceBuilder:
         return self.put('say', prcext.SayHandler(self._mailer, formatter), 's')
+
+
+def _ls_without_index(ls_filter: typing.Callable | None) -> typing.Callable:
+    def ls_without_index(entry) -> bool:
+        if entry['name'].endswith(msglog.INDEX_SUFFIX):
+            return False
+        return ls_filter(entry) if ls_filter else True
+    return ls_without_index
@@ -4,6 +4,7 @@ import typing
 # ALLOW util.* msg*.*
 from core.util import util, funcutil
 from core.msg import msgabc, msgsvc
+from core.msgc import mc
 
 
 class Context(msgabc.MulticastMailer):
@@ -12,9 +13,11 @@ class Context(msgabc.MulticastMailer):
         self._parent: typing.Optional[Context] = None
         self._children: typing.List[Context] = []
         self._configuration = configuration.copy() if configuration else {}
-        self._mailer = msgsvc.TaskMulticastMailer()
+        self._mailer = msgsvc.TaskMulticastMailer(indexed=True, sweep_interval=30.0, priority=mc.Priority.FILTER)
 
     def start(self) -> asyncio.Task:
+        if self.config('mailerstats'):
+            self._mailer.instrument()
         return self._mailer.start()
 
     def create_subcontext(self, configuration: dict) -> Context:
@@ -64,6 +67,18 @@ class Context(msgabc.MulticastMailer):
     def post(self, *vargs) -> bool:
         return self._mailer.post(*vargs)
 
+    def correlate(self, request: msgabc.Message) -> asyncio.Future:
+        return self._mailer.correlate(request)
+
+    def backlog(self) -> int:
+        return self._mailer.backlog()
+
+    def lifecycle(self) -> typing.Tuple[int, int, int]:
+        return self._mailer.lifecycle()
+
+    def mailer_stats(self) -> typing.Dict[str, typing.Tuple[int, msgsvc.MailerStats]]:
+        return self._mailer.stats()
+
     async def shutdown(self):
         for subcontext in self.subcontexts():
             await self.destroy_subcontext(subcontext)
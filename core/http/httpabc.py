@@ -152,6 +152,10 @@ class Resource(AllowMethod, metaclass=abc.ABCMeta):
     def children(self, *kinds: ResourceKind) -> typing.List[Resource]:
         pass
 
+    @abc.abstractmethod
+    def route(self, segment: str) -> typing.Optional[Resource]:
+        pass
+
     @abc.abstractmethod
     async def handle_get(self, url: URL, secure: bool, subpath: str = '') -> AbcResponse:
         pass
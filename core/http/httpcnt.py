@@ -16,6 +16,9 @@ CONTENT_DISPOSITION = 'Content-Disposition'
 CACHE_CONTROL, CACHE_CONTROL_NO_STORE = 'Cache-Control', 'no-store'
 ACCEPT_RANGES, ACCEPT_RANGES_NONE = 'Accept-Ranges', 'none'
 ACCEPT_ENCODING = 'Accept-Encoding'
+ETAG, IF_NONE_MATCH = 'ETag', 'If-None-Match'
+LAST_MODIFIED, IF_MODIFIED_SINCE = 'Last-Modified', 'If-Modified-Since'
+VARY = 'Vary'
 ALLOW = 'Allow'
 ACCESS_CONTROL_ALLOW_METHODS = 'Access-Control-Allow-Methods'
 ACCESS_CONTROL_ALLOW_HEADERS = 'Access-Control-Allow-Headers'
@@ -120,6 +123,7 @@ MIME_MULTIPART_FORM_DATA = 'multipart/form-data'
 MIME_TEXT_PLAIN = 'text/plain'
 MIME_TEXT_HTML = 'text/html'
 MIME_TEXT_CSS = 'text/css'
+MIME_TEXT_EVENT_STREAM = 'text/event-stream'
 MIME_APPLICATION_XML = 'application/xml'
 MIME_APPLICATION_JSON = 'application/json'
 MIME_APPLICATION_YAML = 'application/yaml'
@@ -137,6 +141,7 @@ CONTENT_TYPE_TEXT_PLAIN_UTF8 = ContentTypeImpl(MIME_TEXT_PLAIN + '; ' + _CHARSET
 CONTENT_TYPE_TEXT_PLAIN = ContentTypeImpl(MIME_TEXT_PLAIN)
 CONTENT_TYPE_APPLICATION_JSON = ContentTypeImpl(MIME_APPLICATION_JSON)
 CONTENT_TYPE_APPLICATION_BIN = ContentTypeImpl(MIME_APPLICATION_BIN)
+CONTENT_TYPE_TEXT_EVENT_STREAM = ContentTypeImpl(MIME_TEXT_EVENT_STREAM + '; ' + _CHARSET + gc.UTF_8.upper())
 
 _CONTENT_TYPES = {
     'txt': CONTENT_TYPE_TEXT_PLAIN,
@@ -168,5 +173,7 @@ _CONTENT_TYPES = {
     'woff2': ContentTypeImpl('font/woff2'),
     'ttf': ContentTypeImpl('font/ttf'),
     'zip': ContentTypeImpl('application/zip'),
+    'gz': ContentTypeImpl('application/gzip'),
+    'xz': ContentTypeImpl('application/x-xz'),
     'jar': ContentTypeImpl('application/java-archive')
 }
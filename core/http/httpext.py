@@ -2,6 +2,7 @@ from __future__ import annotations
 import logging
 import asyncio
 import typing
+import re
 import aiofiles
 # ALLOW util.* msg*.* context.* http.*
 from core.util import util, io, tasks, aggtrf, objconv, dtutil
@@ -97,13 +98,20 @@ class UnpackerHandler(httpabc.PostHandler):
 class RollingLogHandler(httpabc.GetHandler):
 
     def __init__(self, mailer: msgabc.MulticastMailer, msg_filter: msgabc.Filter, size: int = 100):
-        self._log = msgext.RollingLogSubscriber(mailer, size, msg_filter, msgtrf.GetData(), aggtrf.StrJoin('\n'))
+        self._log = msgext.RollingLogSubscriber(size, msg_filter, msgtrf.GetData(), aggtrf.StrJoin('\n'))
         mailer.register(self._log)
 
-    async def handle_get(self, resource, data):
+    def handle_get(self, resource, data):
         if not httpsec.is_secure(data):
             return httpabc.ResponseBody.UNAUTHORISED
-        return await self._log.get()
+        since = util.get('since', data)
+        if since is None:
+            return self._log.get()
+        try:
+            sequence, lines = self._log.since(int(since))
+        except ValueError:
+            return httpabc.ResponseBody.BAD_REQUEST
+        return {'sequence': sequence, 'lines': lines}
 
 
 class WipeHandler(httpabc.PostHandler):
@@ -235,6 +243,47 @@ class FileSystemHandler(httpabc.GetHandler, httpabc.PostHandler):
         return self._path + '/' + tail
 
 
+class LogSearchHandler(httpabc.GetHandler):
+    LIMIT = 10000
+
+    def __init__(self, path: str, tail: str):
+        self._path, self._tail = path, tail
+
+    async def handle_get(self, resource, data):
+        if not httpsec.is_secure(data):
+            return httpabc.ResponseBody.UNAUTHORISED
+        tail = util.get(self._tail, data)
+        if not tail or tail.find('..') > -1:
+            return httpabc.ResponseBody.BAD_REQUEST
+        path = self._path + '/' + tail
+        if not await io.file_exists(path):
+            return httpabc.ResponseBody.NOT_FOUND
+        try:
+            start, end = _float_arg('from', data), _float_arg('to', data)
+            limit = int(util.get('limit', data, LogSearchHandler.LIMIT))
+            line_filter = _line_filter(util.get('contains', data), util.get('regex', data))
+            lines = await msglog.search_logfile(path, start, end, line_filter, min(limit, LogSearchHandler.LIMIT))
+        except (ValueError, re.error):
+            return httpabc.ResponseBody.BAD_REQUEST
+        return '\n'.join(lines) if lines else httpabc.ResponseBody.NO_CONTENT
+
+
+def _float_arg(key: str, data: httpabc.AbcDataGet) -> float | None:
+    value = util.get(key, data)
+    return float(value) if value else None
+
+
+def _line_filter(contains: str | None, regex: str | None) -> typing.Callable[[str], bool] | None:
+    pattern = re.compile(regex) if regex else None
+    if contains and pattern:
+        return lambda line: contains in line and pattern.search(line) is not None
+    if contains:
+        return lambda line: contains in line
+    if pattern:
+        return lambda line: pattern.search(line) is not None
+    return None
+
+
 class _FileByteStream(httpabc.ByteStream):
 
     def __init__(self, filename: str, content_length: int | None, tracker: io.BytesTracker = io.NullBytesTracker()):
@@ -93,6 +93,8 @@ class WebResource(httpabc.Resource):
         self._name, self._kind, self._handler = name, kind, handler
         self._parent: typing.Optional[WebResource] = None
         self._children: typing.List[WebResource] = []
+        self._routes: typing.Dict[str, WebResource] = {}
+        self._arg: typing.Optional[WebResource] = None
 
     def append(self, resource: WebResource):
         name = resource.name()
@@ -100,10 +102,14 @@ class WebResource(httpabc.Resource):
             raise Exception(f'Resource "{name}" already exists')
         if self.kind() is httpabc.ResourceKind.ARG_TAIL:
             raise Exception(f'Resource "{name}" type ARG_TAIL cannot have children')
-        if resource.kind().is_arg() and len(self.children(*ARG_KINDS)) > 0:
+        if resource.kind().is_arg() and self._arg is not None:
             raise Exception(f'Resource "{name}" type ARG must be singular')
         resource._parent = self
         self._children.append(resource)
+        if resource.kind().is_arg():
+            self._arg = resource
+        else:
+            self._routes[name] = resource
 
     def handler(self, handler: typing.Optional[httpabc.AbcHandler] = None) -> typing.Optional[httpabc.AbcHandler]:
         if handler:
@@ -116,6 +122,10 @@ class WebResource(httpabc.Resource):
         resource = self.child(name)
         if resource:
             self._children.remove(resource)
+            if resource is self._arg:
+                self._arg = None
+            else:
+                del self._routes[name]
 
     def kind(self) -> httpabc.ResourceKind:
         return self._kind
@@ -135,7 +145,13 @@ class WebResource(httpabc.Resource):
     def child(self, name: str) -> typing.Optional[WebResource]:
         if name is None:
             return None
-        return util.single([c for c in self._children if c.name() == name])
+        resource = self._routes.get(name)
+        if resource is None and self._arg is not None and self._arg.name() == name:
+            return self._arg
+        return resource
+
+    def route(self, segment: str) -> typing.Optional[WebResource]:
+        return self._routes.get(segment, self._arg)
 
     def children(self, *kinds: httpabc.ResourceKind) -> typing.List[WebResource]:
         if len(kinds) == 0:
@@ -175,18 +191,12 @@ class PathProcessor:
     def lookup_resource(self, path: str) -> typing.Optional[httpabc.Resource]:
         found, current = False, self._resource
         for element in PathProcessor._split(path):
-            found_path, found_arg = False, False
-            for path_resource in current.children(httpabc.ResourceKind.PATH):
-                if not found_path and element == path_resource.name():
-                    found, found_path, current = True, True, path_resource
-            if not found_path:
-                arg_resource = util.single(current.children(*ARG_KINDS))
-                if arg_resource is not None:
-                    found, found_arg, current = True, True, arg_resource
-                    if arg_resource.kind() is httpabc.ResourceKind.ARG_TAIL:
-                        return arg_resource
-            if not (found_path or found_arg):
+            current = current.route(element)
+            if current is None:
                 return None
+            if current.kind() is httpabc.ResourceKind.ARG_TAIL:
+                return current
+            found = True
         return current if found else None
 
     def build_path(self, args: typing.Optional[typing.Dict[str, str]] = None) -> str:
@@ -1,31 +1,46 @@
 from __future__ import annotations
 import logging
 import typing
+import time
+import hashlib
+import collections
+from email import utils as emailutils
 from aiohttp import web, abc as webabc, web_exceptions as err
 # ALLOW util.* msg*.* context.* http.httpabc http.httpcnt
 from core.util import gc, pack, pkg
 from core.http import httpabc, httpcnt
 
+CACHE_SIZE = 16777216
+
 
 class Statics:
 
-    def __init__(self):
-        self._loader = _CacheLoader()
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self._loader = _CacheLoader(max_size)
 
     async def handle(self, request: webabc.Request) -> web.Response:
         resource = await self._loader.load(request.path)
         if resource is None:
             raise err.HTTPNotFound
+        headers = httpcnt.HeadersTool(request)
+        gzipped = resource.compressed() is not None and headers.accepts_encoding(gc.GZIP)
+        etag = resource.etag(gzipped)
         response, content_type = web.Response(), resource.content_type()
-        response.headers.add(httpcnt.CONTENT_TYPE, content_type.content_type())
         cache_control = 'private, max-age=3600' if content_type.is_text_type() else 'public, max-age=2592000'
         response.headers.add(httpcnt.CACHE_CONTROL, cache_control)
+        response.headers.add(httpcnt.ETAG, etag)
+        response.headers.add(httpcnt.LAST_MODIFIED, resource.last_modified())
+        response.headers.add(httpcnt.VARY, httpcnt.ACCEPT_ENCODING)
+        if _not_modified(headers, etag, resource.modified()):
+            response.set_status(304)
+            return response
+        response.headers.add(httpcnt.CONTENT_TYPE, content_type.content_type())
         response.headers.add(httpcnt.ACCEPT_RANGES, httpcnt.ACCEPT_RANGES_NONE)
-        if httpcnt.HeadersTool(request).accepts_encoding(gc.GZIP) and await resource.compress():
+        if gzipped:
             response.headers.add(httpcnt.CONTENT_ENCODING, gc.GZIP)
             body = resource.compressed()
         else:
-            body = await resource.uncompressed()
+            body = resource.uncompressed()
         length = len(body)
         if length > 524288:  # Half a Megabyte
             logging.warning('Large static file %s (%s bytes)', request.path, length)
@@ -34,26 +49,54 @@ class Statics:
         return response
 
 
+def _not_modified(headers: httpcnt.HeadersTool, etag: str, modified: int) -> bool:
+    if_none_match = headers.get(httpcnt.IF_NONE_MATCH)
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+    if_modified_since = headers.get(httpcnt.IF_MODIFIED_SINCE)
+    if not if_modified_since:
+        return False
+    try:
+        return modified <= emailutils.parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
 class _CacheLoader:
 
-    def __init__(self):
-        self._loader = _Loader()
-        self._cache = {}
+    def __init__(self, max_size: int = CACHE_SIZE, loader: typing.Optional[_Loader] = None):
+        self._loader = loader if loader else _Loader()
+        self._max_size, self._size = max_size, 0
+        self._cache: collections.OrderedDict[str, _Resource] = collections.OrderedDict()
+
+    def size(self) -> int:
+        return self._size
 
     async def load(self, path: str) -> typing.Optional[_Resource]:
         resource = self._cache.get(path)
         if resource is not None:
+            self._cache.move_to_end(path)
             return resource
         resource = await self._loader.load(path)
         if resource is None:
             return None
-        if resource.content_type().is_text_type():
-            self._cache[path] = resource
+        await resource.compress()
+        if path in self._cache or resource.size() > self._max_size:
+            return resource
+        self._cache[path] = resource
+        self._size += resource.size()
+        while self._size > self._max_size:
+            _, evicted = self._cache.popitem(last=False)
+            self._size -= evicted.size()
         return resource
 
 
 class _Loader:
 
+    def __init__(self):
+        self._modified = int(time.time())
+
     async def load(self, path: str) -> typing.Optional[_Resource]:
         if not path:
             path = '/'
@@ -61,7 +104,7 @@ class _Loader:
             path += 'index.html'
         try:
             data = await pkg.pkg_load('web', path)
-            return _Resource(httpcnt.ContentTypeImpl.lookup(path), data) if data else None
+            return _Resource(httpcnt.ContentTypeImpl.lookup(path), data, self._modified) if data else None
         except (IsADirectoryError, FileNotFoundError, OSError):
             if path.endswith('/index.html'):
                 return await self.load('/'.join(path.split('/')[:-1]) + '.html')
@@ -72,32 +115,37 @@ class _Loader:
 
 class _Resource:
 
-    def __init__(self, content_type: httpabc.ContentType, data: typing.Any):
-        self._content_type, self._data = content_type, data
-        self._compressed = None
+    def __init__(self, content_type: httpabc.ContentType, data: bytes, modified: int):
+        self._content_type, self._data, self._modified = content_type, data, modified
+        self._last_modified = emailutils.formatdate(modified, usegmt=True)
+        self._etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self._compressed, self._checked = None, False
 
     def content_type(self) -> httpabc.ContentType:
         return self._content_type
 
-    async def compress(self) -> bool:
-        if self._compressed is not None:
-            return self._compressed
-        if not self._content_type.is_text_type():
-            self._compressed = False
-            return False
+    def modified(self) -> int:
+        return self._modified
+
+    def last_modified(self) -> str:
+        return self._last_modified
+
+    def etag(self, compressed: bool = False) -> str:
+        return '"' + self._etag + ('-gz"' if compressed else '"')
+
+    def size(self) -> int:
+        return len(self._data) + (len(self._compressed) if self._compressed else 0)
+
+    async def compress(self):
+        if self._checked:
+            return
         data = await pack.gzip_compress(self._data)
-        if len(self._data) < len(data):
-            self._compressed = False
-        else:
-            self._data = data
-            self._compressed = True
-        return self._compressed
+        if len(data) < len(self._data):
+            self._compressed = data
+        self._checked = True
 
-    def compressed(self) -> typing.Any:
-        assert self._compressed is True
-        return self._data
+    def compressed(self) -> typing.Optional[bytes]:
+        return self._compressed
 
-    async def uncompressed(self) -> typing.Any:
-        if self._compressed:
-            return await pack.gzip_decompress(self._data)
+    def uncompressed(self) -> bytes:
         return self._data
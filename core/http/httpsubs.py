@@ -1,13 +1,14 @@
 from __future__ import annotations
 import asyncio
+import collections
 import logging
 import time
 import uuid
 import typing
-# ALLOW util.* msg*.* context.* http.httpabc
-from core.util import aggtrf, util
+# ALLOW util.* msg*.* context.* http.httpabc http.httpcnt http.httprsc
+from core.util import aggtrf, util, objconv
 from core.msg import msgabc, msgext, msgftr, msgtrf
-from core.http import httpabc
+from core.http import httpabc, httpcnt, httprsc
 
 
 class Selector:
@@ -59,6 +60,7 @@ class HttpSubscriptionService(msgabc.AbcSubscriber):
         self._mailer = mailer
         self._subscriptions_path = '/subscriptions'
         self._subscriptions: typing.Dict[str, _Subscriber] = {}
+        self._feeds: typing.Dict[Selector, _Feed] = {}
         mailer.register(_InactivityCheck(mailer))
         mailer.register(self)
 
@@ -75,9 +77,12 @@ class HttpSubscriptionService(msgabc.AbcSubscriber):
             identity = str(uuid.uuid4())
             path = self._subscriptions_path + '/' + identity
             logging.debug('Http subscription created at %s', path)
-            subscriber = _Subscriber(self._mailer, identity, data)
-            self._subscriptions[identity] = subscriber
-            self._mailer.register(subscriber)
+            feed = self._feeds.get(data)
+            if feed is None or feed.expired():
+                feed = _Feed(self._mailer, data)
+                self._feeds[data] = feed
+                self._mailer.register(feed)
+            self._subscriptions[identity] = feed.attach(identity)
             self._mailer.post(self, HttpSubscriptionService.SUBSCRIBE_RESPONSE, path, message)
         elif name is HttpSubscriptionService.UNSUBSCRIBE:
             if data:
@@ -86,6 +91,9 @@ class HttpSubscriptionService(msgabc.AbcSubscriber):
                 if subscriber:
                     del self._subscriptions[identity]
                     subscriber.close()
+                    feed = subscriber.feed()
+                    if feed.expired() and self._feeds.get(feed.selector()) is feed:
+                        del self._feeds[feed.selector()]
         return None
 
     def subscriptions_handler(self, name: str) -> _SubscriptionsHandler:
@@ -95,49 +103,99 @@ class HttpSubscriptionService(msgabc.AbcSubscriber):
         return _SubscribeHandler(self._mailer, Selector.from_argv(*argv))
 
 
-class _Subscriber(msgabc.AbcSubscriber):
+class _Feed(msgabc.AbcSubscriber, msgabc.Bounded):
+    SIZE = 1000
 
-    def __init__(self, mailer: msgabc.Mailer, identity: str, selector: Selector):
+    def __init__(self, mailer: msgabc.Mailer, selector: Selector):
         super().__init__(msgftr.Or(_InactivityCheck.FILTER, msgftr.IsStop(),
                                    selector.msg_filter, selector.completed_filter))
-        self._mailer, self._identity = mailer, identity
-        self._transformer, self._aggregator = selector.transformer, selector.aggregator
-        self._collect_filter, self._completed_filter = selector.msg_filter, selector.completed_filter
-        self._purge_overflow = selector.aggregator is not None
-        self._poll_timeout, self._inactivity_timeout = 60.0, 120.0
-        self._queue = asyncio.Queue(maxsize=1000)
-        self._running, self._time_last_activity = True, time.time()
+        self._mailer, self._selector = mailer, selector
+        self._buffer = msgext.RingBuffer(_Feed.SIZE)
+        self._changed = asyncio.Event()
+        self._subscribers: typing.Dict[str, _Subscriber] = {}
+        self._running = True
+
+    def selector(self) -> Selector:
+        return self._selector
+
+    def buffer(self) -> msgext.RingBuffer:
+        return self._buffer
+
+    def expired(self):
+        return not self._running
+
+    def queue_limits(self) -> typing.Tuple[int, msgabc.OverflowPolicy]:
+        return _Feed.SIZE, msgabc.OverflowPolicy.DROP_OLDEST  # Ring buffer would overwrite them anyway
+
+    def attach(self, identity: str) -> _Subscriber:
+        subscriber = _Subscriber(self._mailer, identity, self)
+        self._subscribers[identity] = subscriber
+        return subscriber
+
+    def detach(self, identity: str):
+        self._subscribers.pop(identity, None)
+        if not self._subscribers:
+            self._running = False
+            self._notify()
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
 
     def handle(self, message):
         if not self._running:
             return True
         if _InactivityCheck.FILTER.accepts(message):
-            now, last = message.created(), self._time_last_activity
-            if last < 0.0 or ((now - last) < self._inactivity_timeout):
-                return None
-            logging.debug('Http subscription inactive, unsubscribing %s', self._identity)
-            HttpSubscriptionService.unsubscribe(self._mailer, self, self._identity)
-            return True
-        # noinspection PyBroadException
-        try:
-            if self._purge_overflow and self._queue.full():
-                self._queue.get_nowait()
-                self._queue.task_done()
-            self._queue.put_nowait(message)
+            for subscriber in self._subscribers.values():
+                if subscriber.inactive(message.created()):
+                    logging.debug('Http subscription inactive, unsubscribing %s', subscriber.identity())
+                    HttpSubscriptionService.unsubscribe(self._mailer, self, subscriber.identity())
             return None
-        except Exception:
-            logging.debug('Http subscription queue is full, unsubscribing %s', self._identity)
-            HttpSubscriptionService.unsubscribe(self._mailer, self, self._identity)
-            return True
+        if message is msgabc.STOP:
+            self._running = False
+        else:
+            self._buffer.append(message)
+        self._notify()
+        return None if self._running else True
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class _Subscriber:
+
+    def __init__(self, mailer: msgabc.Mailer, identity: str, feed: _Feed):
+        selector = feed.selector()
+        self._mailer, self._identity, self._feed = mailer, identity, feed
+        self._transformer, self._aggregator = selector.transformer, selector.aggregator
+        self._collect_filter, self._completed_filter = selector.msg_filter, selector.completed_filter
+        self._purge_overflow = selector.aggregator is not None
+        self._poll_timeout, self._inactivity_timeout = 60.0, 120.0
+        self._cursor, self._staged, self._stopping = feed.buffer().sequence(), collections.deque(), False
+        self._time_last_activity = time.time()
+
+    def identity(self) -> str:
+        return self._identity
+
+    def feed(self) -> _Feed:
+        return self._feed
+
+    def inactive(self, now: float) -> bool:
+        last = self._time_last_activity
+        return last >= 0.0 and (now - last) >= self._inactivity_timeout
 
     def close(self):
-        self._running = False
-        util.clear_queue(self._queue)
+        self._stopping = True
+        self._staged.clear()
+        self._feed.detach(self._identity)
 
-    async def get(self) -> typing.Union[httpabc.AbcResponse, msgabc.STOP, None]:
+    async def get(self, timeout: float | None = None) -> typing.Union[httpabc.AbcResponse, msgabc.STOP, None]:
         self._time_last_activity = -1.0
         try:
-            result = await self._get()
+            result = await self._get(timeout if timeout else self._poll_timeout)
             if result is msgabc.STOP:
                 logging.debug('Http subscription completed, unsubscribing %s', self._identity)
                 HttpSubscriptionService.unsubscribe(self._mailer, self, self._identity)
@@ -145,18 +203,18 @@ class _Subscriber(msgabc.AbcSubscriber):
         finally:
             self._time_last_activity = time.time()
 
-    async def _get(self) -> typing.Union[httpabc.AbcResponse, msgabc.STOP, None]:
+    async def _get(self, timeout: float) -> typing.Union[httpabc.AbcResponse, msgabc.STOP, None]:
         if self._aggregator is None:
-            message = await self._get_one()
+            message = await self._get_one(timeout)
             if message is None or message is msgabc.STOP:
                 return message
             if self._completed_filter.accepts(message):
                 if self._collect_filter.accepts(message):
-                    self._queue.put_nowait(msgabc.STOP)
+                    self._stopping = True
                 else:
                     return msgabc.STOP
-            return self._transformer.transform(message)
-        messages = await self._get_all()
+            return message.derive(self._transformer.transform)
+        messages = await self._get_all(timeout)
         message_count = len(messages)
         if message_count == 0:
             return None
@@ -168,34 +226,50 @@ class _Subscriber(msgabc.AbcSubscriber):
                 if message_count == 1:
                     return msgabc.STOP
                 messages.remove(last_message)
-            self._queue.put_nowait(msgabc.STOP)
-        return self._aggregator.aggregate([self._transformer.transform(m) for m in messages])
+            self._stopping = True
+        return self._aggregator.aggregate([m.derive(self._transformer.transform) for m in messages])
 
-    async def _get_all(self) -> typing.List[msgabc.Message]:
+    async def _get_all(self, timeout: float) -> typing.List[msgabc.Message]:
         messages = []
-        if self._queue.empty():
-            message = await self._get_one()
-            if message is not None:
-                messages.append(message)
-            return messages
-        try:
-            while True:
-                message = self._queue.get_nowait()
-                messages.append(message)
-                self._queue.task_done()
-                if message is msgabc.STOP or self._completed_filter.accepts(message):
-                    return messages
-        except asyncio.QueueEmpty:
-            pass
+        result = await self._stage(timeout) if not self._staged else self._stage_now()
+        if result is msgabc.STOP and not self._staged:
+            return [result]
+        while self._staged:
+            message = self._staged.popleft()
+            messages.append(message)
+            if self._completed_filter.accepts(message):
+                return messages
         return messages
 
-    async def _get_one(self) -> typing.Union[msgabc.Message, None]:
-        try:
-            message = await asyncio.wait_for(self._queue.get(), self._poll_timeout)
-            self._queue.task_done()
-            return message
-        except asyncio.TimeoutError:
-            return None
+    async def _get_one(self, timeout: float) -> typing.Union[msgabc.Message, None]:
+        if not self._staged:
+            result = await self._stage(timeout)
+            if result is msgabc.STOP:
+                return result
+        return self._staged.popleft() if self._staged else None
+
+    async def _stage(self, timeout: float) -> typing.Union[msgabc.STOP, None]:
+        if not self._stopping and self._feed.buffer().sequence() == self._cursor:
+            await self._feed.wait(timeout)
+        return self._stage_now()
+
+    def _stage_now(self) -> typing.Union[msgabc.STOP, None]:
+        buffer = self._feed.buffer()
+        sequence = buffer.sequence()
+        if self._stopping:
+            return msgabc.STOP
+        if sequence == self._cursor:
+            return msgabc.STOP if self._feed.expired() else None
+        if (sequence - self._cursor) > buffer.size() and not self._purge_overflow:
+            logging.debug('Http subscription fell behind, unsubscribing %s', self._identity)
+            return msgabc.STOP
+        self._staged.extend(buffer.since(self._cursor))
+        self._cursor = sequence
+        return None
+
+
+def is_subscription(resource: httpabc.Resource) -> bool:
+    return isinstance(resource, httprsc.WebResource) and isinstance(resource.handler(), _SubscriptionsHandler)
 
 
 class _SubscriptionsHandler(httpabc.GetHandler):
@@ -208,6 +282,8 @@ class _SubscriptionsHandler(httpabc.GetHandler):
         subscriber = self._service.lookup(identity)
         if subscriber is None:
             return httpabc.ResponseBody.NOT_FOUND
+        if util.get('stream', data) == 'sse':
+            return _EventStream(subscriber)
         result = await subscriber.get()
         if result is msgabc.STOP:
             return httpabc.ResponseBody.NOT_FOUND
@@ -216,6 +292,34 @@ class _SubscriptionsHandler(httpabc.GetHandler):
         return result
 
 
+class _EventStream(httpabc.ByteStream):
+    HEARTBEAT = 15.0
+
+    def __init__(self, subscriber: _Subscriber):
+        self._subscriber, self._sequence, self._done = subscriber, 0, False
+
+    def name(self) -> str:
+        return 'events'
+
+    def content_type(self) -> httpabc.ContentType:
+        return httpcnt.CONTENT_TYPE_TEXT_EVENT_STREAM
+
+    def content_length(self) -> int | None:
+        return None
+
+    async def read(self, length: int = -1) -> bytes:
+        if self._done:
+            return b''
+        result = await self._subscriber.get(_EventStream.HEARTBEAT)
+        if result is None:
+            return b': heartbeat\n\n'
+        if result is msgabc.STOP:
+            self._done = True
+            return b'event: end\ndata: {}\n\n'
+        self._sequence += 1
+        return ('id: ' + str(self._sequence) + '\ndata: ' + objconv.obj_to_json(result) + '\n\n').encode()
+
+
 class _SubscribeHandler(httpabc.PostHandler):
 
     def __init__(self, mailer: msgabc.MulticastMailer, selector: Selector):
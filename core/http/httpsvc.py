@@ -2,15 +2,16 @@ import logging
 import re
 import aiohttp
 from aiohttp import web, abc as webabc, web_exceptions as err
-# ALLOW util.* msg*.* context.* http.httpabc http.httpcnt http.httpstatics
+# ALLOW util.* msg*.* context.* http.httpabc http.httpcnt http.httpstatics http.httpws
 from core.util import gc, util, pack, io, objconv
 from core.msgc import mc
 from core.context import contextsvc
-from core.http import httpabc, httpcnt, httpsec, httpstatics, httpssl
+from core.http import httpabc, httpcnt, httpsec, httpstatics, httpssl, httpws
 
 _ACCEPTED_MIME_TYPES = (httpcnt.MIME_TEXT_PLAIN, httpcnt.MIME_APPLICATION_JSON,
                         httpcnt.MIME_MULTIPART_FORM_DATA, httpcnt.MIME_APPLICATION_BIN)
 _TEXT_MIME_TYPES = (httpcnt.MIME_TEXT_PLAIN, httpcnt.MIME_APPLICATION_JSON)
+WEBSOCKET_PATH = '/websocket'
 
 
 class HttpService:
@@ -24,6 +25,7 @@ class HttpService:
         self._app.on_startup.append(self._initialise)
         self._app.on_shutdown.append(self._shutdown)
         self._app.add_routes([
+            web.get(WEBSOCKET_PATH, self._handle_websocket),
             web.options('/{tail:.*}', self._handle),
             web.get('/{tail:.*}', self._handle),
             web.post('/{tail:.*}', self._handle)])
@@ -61,6 +63,12 @@ class HttpService:
             httpcnt.dump_request(request)
         return await _RequestHandler(self._context, self._security, method, request, resource).handle()
 
+    async def _handle_websocket(self, request: webabc.Request) -> web.StreamResponse:
+        if self._resources is None:
+            raise err.HTTPServiceUnavailable
+        handler = _RequestHandler(self._context, self._security, httpabc.Method.GET, request, self._resources)
+        return await handler.handle_websocket()
+
 
 class _RequestHandler:
 
@@ -113,6 +121,16 @@ class _RequestHandler:
         response_body = await self._resource.handle_post(request_url, request_body, request_subpath)
         return await self._build_response(response_body)
 
+    async def handle_websocket(self) -> web.WebSocketResponse:
+        if not self._security.check(self._request):
+            raise err.HTTPUnauthorized
+        socket = web.WebSocketResponse(heartbeat=30.0)
+        await socket.prepare(self._request)
+        session = httpws.WebSocketSession(
+            socket, self._resource, self._request_url(), True, self._request_subpath())
+        await session.run()
+        return socket
+
     def _request_url(self):
         url, scheme = self._request.url, self._headers.get(httpcnt.X_FORWARDED_PROTO)
         if scheme:
@@ -164,7 +182,8 @@ class _RequestHandler:
             content_length = body.content_length()
             if content_length is None:
                 response.enable_chunked_encoding()
-                if self._headers.accepts_encoding(gc.DEFLATE):
+                # Event streams are not compressed, the compressor would hold back events
+                if self._headers.accepts_encoding(gc.DEFLATE) and not _is_event_stream(body):
                     response.enable_compression()
             else:
                 response.headers.add(httpcnt.CONTENT_LENGTH, str(content_length))
@@ -251,3 +270,7 @@ class _AccessLogFilter(logging.Filter):
 
     def filter(self, record):
         return self._regex.match(record.getMessage()) is None
+
+
+def _is_event_stream(body: httpabc.ByteStream) -> bool:
+    return body.content_type().mime_type() == httpcnt.MIME_TEXT_EVENT_STREAM
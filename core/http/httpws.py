@@ -0,0 +1,134 @@
+from __future__ import annotations
+import asyncio
+import logging
+import typing
+from yarl import URL
+from aiohttp import web, WSMsgType
+# ALLOW util.* http.httpabc http.httpsubs
+from core.util import objconv, tasks, util
+from core.http import httpabc, httpsubs
+
+
+class WebSocketSession:
+    CREDIT = 16
+
+    def __init__(self, socket: web.WebSocketResponse, resources: httpabc.Resource,
+                 url: URL, secure: bool, subpath: str = ''):
+        self._socket, self._resources = socket, resources
+        self._url, self._secure, self._subpath = url, secure, subpath
+        self._channels: typing.Dict[str, _Channel] = {}
+        self._lock = asyncio.Lock()
+
+    async def run(self):
+        try:
+            async for message in self._socket:
+                if message.type is WSMsgType.TEXT:
+                    await self._receive(message.data)
+        finally:
+            channels = list(self._channels.values())
+            self._channels.clear()
+            for channel in channels:
+                await channel.close()
+
+    async def send(self, payload: dict) -> bool:
+        if self._socket.closed:
+            return False
+        async with self._lock:
+            try:
+                await self._socket.send_str(objconv.obj_to_json(payload))
+                return True
+            except Exception as e:
+                logging.debug('WebSocketSession send failed: %s', repr(e))
+        return False
+
+    def ended(self, name: str):
+        self._channels.pop(name, None)
+
+    async def _receive(self, data: str):
+        request = objconv.json_to_dict(data)
+        if not isinstance(request, dict):
+            await self.send({'error': 'bad request'})
+            return
+        name = util.get('channel', request)
+        if not name:
+            await self.send({'error': 'channel required'})
+            return
+        name = str(name)
+        try:
+            if 'subscribe' in request:
+                await self._subscribe(name, str(request['subscribe']), int(request.get('credit', self.CREDIT)))
+            elif 'ack' in request:
+                channel = util.get(name, self._channels)
+                if channel:
+                    channel.grant(int(request['ack']))
+            elif 'unsubscribe' in request:
+                channel = self._channels.pop(name, None)
+                if channel:
+                    await channel.close()
+        except (ValueError, TypeError):
+            await self.send({'channel': name, 'error': 'bad request'})
+
+    async def _subscribe(self, name: str, target: str, credit: int):
+        if name in self._channels:
+            await self.send({'channel': name, 'error': 'channel exists'})
+            return
+        target = URL(target)
+        path = target.path
+        if self._subpath and path.startswith('/' + self._subpath + '/'):
+            path = path[len(self._subpath) + 1:]
+        resource = self._resources.lookup(path)
+        if resource is None or not httpsubs.is_subscription(resource):  # Only long polled resources can be pumped
+            await self.send({'channel': name, 'error': 'not found'})
+            return
+        url = self._url.with_path(path).with_query(target.query)
+        self._channels[name] = _Channel(self, name, resource, url, self._secure, self._subpath, credit)
+
+
+class _Channel:
+
+    def __init__(self, session: WebSocketSession, name: str, resource: httpabc.Resource,
+                 url: URL, secure: bool, subpath: str, credit: int):
+        self._session, self._name, self._resource = session, name, resource
+        self._url, self._secure, self._subpath = url, secure, subpath
+        self._credit, self._granted = credit, asyncio.Event()
+        if credit > 0:
+            self._granted.set()
+        self._task = tasks.task_start(self._run(), 'WebSocketChannel(' + name + ')')
+
+    def grant(self, count: int):
+        self._credit += count
+        if self._credit > 0:
+            self._granted.set()
+
+    async def close(self):
+        if self._task.done():
+            return
+        self._task.cancel()
+        await asyncio.wait((self._task,))
+        tasks.task_end(self._task)
+
+    async def _run(self):
+        try:
+            await self._pump()
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logging.debug('WebSocketChannel %s failed: %s', self._name, repr(e))
+            await self._session.send({'channel': self._name, 'error': 'failed'})
+        self._session.ended(self._name)
+        tasks.task_end(self._task)
+
+    async def _pump(self):
+        while True:
+            await self._granted.wait()
+            body = await self._resource.handle_get(self._url, self._secure, self._subpath)
+            if body is httpabc.ResponseBody.NO_CONTENT:
+                continue
+            if not isinstance(body, (str, dict, list, tuple)):
+                await self._session.send({'channel': self._name, 'end': True})
+                return
+            self._credit -= 1
+            if self._credit <= 0:
+                self._granted.clear()
+            if not await self._session.send({'channel': self._name, 'data': body}):
+                return
@@ -2,17 +2,19 @@ from asyncio import subprocess
 from prometheus_client import registry
 # ALLOW util.* msg*.* context.* metrics.mtxutil
 from core.util import signals
-from core.msg import msgabc, msgftr
+from core.msg import msgabc, msgftr, msgpipe
 from core.msgc import sc, mc
 from core.context import contextsvc
-from core.metrics import mtxutil, mtxproc
+from core.metrics import mtxutil, mtxproc, mtxmailer
 
 
 async def initialise(context: contextsvc.Context, players: bool = True, error_filter: msgabc.Filter = None):
     instance, module = context.config('identity'), context.config('module')
     instance_registry = await mtxutil.create_instance_registry()
     context.register(_InstanceCleanup(instance_registry))
+    await mtxmailer.create_mailer_collector(instance_registry, instance, context)
     context.register(await _InstanceProcessMetrics(instance, module, instance_registry).initialise())
+    context.register(await _InstanceLineMetrics(instance, instance_registry).initialise())
     if players:
         context.register(await _InstancePlayerMetrics(instance, instance_registry).initialise())
     if error_filter:
@@ -102,6 +104,25 @@ class _InstancePlayerMetrics(msgabc.AbcSubscriber):
         return None
 
 
+class _InstanceLineMetrics(msgabc.AbcSubscriber):
+
+    def __init__(self, instance: str, instance_registry: registry.CollectorRegistry):
+        super().__init__(msgftr.NameIs(msgpipe.LineLimiter.SUPPRESSED))
+        self._instance, self._instance_registry = instance, instance_registry
+        self._suppressed_counter = None
+
+    async def initialise(self) -> msgabc.Subscriber:
+        self._suppressed_counter = await mtxutil.create_counter(
+            self._instance_registry, 'log_lines_suppressed',
+            'Count of log lines collapsed or rate limited', ('reason', ))
+        return self
+
+    async def handle(self, message):
+        reason, count = message.data()
+        await mtxutil.inc_counter(self._suppressed_counter, self._instance, count, (reason, ))
+        return None
+
+
 class _InstanceErrorMetrics(msgabc.AbcSubscriber):
 
     def __init__(self, instance: str, instance_registry: registry.CollectorRegistry, error_filter: msgabc.Filter):
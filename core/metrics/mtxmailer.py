@@ -0,0 +1,65 @@
+import logging
+import typing
+from prometheus_client import metrics_core, metrics, registry
+# ALLOW util.* context.*
+from core.util import funcutil
+from core.context import contextsvc
+from core.metrics import mtxutil
+
+
+class _MailerCollector(registry.Collector):
+
+    def __init__(self, instance: str, context: contextsvc.Context):
+        self._instance, self._context = instance, context
+
+    def collect(self) -> typing.Iterable[metrics.Metric]:
+        live, registered, removed = self._context.lifecycle()
+        labels = [mtxutil.PROC_LABEL_KEY]
+        live_metric = metrics_core.GaugeMetricFamily(
+            'mailer_subscribers', 'Number of live subscribers on the message bus', labels=labels)
+        live_metric.add_metric([self._instance], live)
+        registered_metric = metrics_core.CounterMetricFamily(
+            'mailer_registrations', 'Total subscribers registered on the message bus', labels=labels)
+        registered_metric.add_metric([self._instance], registered)
+        removed_metric = metrics_core.CounterMetricFamily(
+            'mailer_removals', 'Total subscribers removed from the message bus', labels=labels)
+        removed_metric.add_metric([self._instance], removed)
+        return [live_metric, registered_metric, removed_metric] + self._collect_stats()
+
+    def _collect_stats(self) -> typing.List[metrics.Metric]:
+        stats = self._context.mailer_stats()
+        if not stats:
+            return []
+        labels = [mtxutil.PROC_LABEL_KEY, 'subscriber']
+        depth_metric = metrics_core.GaugeMetricFamily(
+            'mailer_queue_depth', 'Messages waiting in subscriber queues', labels=labels)
+        wait_metric = metrics_core.HistogramMetricFamily(
+            'mailer_queue_wait_seconds', 'Time messages wait in subscriber queues', labels=labels)
+        handle_metric = metrics_core.HistogramMetricFamily(
+            'mailer_handle_seconds', 'Time spent in subscriber handlers', labels=labels)
+        for subscriber, (depth, mailer_stats) in stats.items():
+            labelvalues = [self._instance, subscriber]
+            depth_metric.add_metric(labelvalues, depth)
+            for metric, histogram in ((wait_metric, mailer_stats.wait()), (handle_metric, mailer_stats.handle())):
+                buckets = [(_bound(bound), count) for bound, count in histogram.buckets()]
+                metric.add_metric(labelvalues, buckets, histogram.sum())
+        return [depth_metric, wait_metric, handle_metric]
+
+
+def _bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else str(bound)
+
+
+def _sync_create_mailer_collector(
+        a_registry: registry.CollectorRegistry,
+        instance: str, context: contextsvc.Context) -> typing.Optional[registry.Collector]:
+    try:
+        collector = _MailerCollector(instance, context)
+        a_registry.register(collector)
+        return collector
+    except Exception as e:
+        logging.debug('mtxmailer.create_mailer_collector() %s', repr(e))
+    return None
+
+
+create_mailer_collector = funcutil.to_async(_sync_create_mailer_collector)
@@ -72,16 +72,23 @@ def _sync_set_gauge(gauge: metrics.Gauge, instance: str, value: float, labelvalu
     gauge.labels(*allvalues).set(value)
 
 
-def _sync_create_counter(a_registry: registry.CollectorRegistry, name: str, documentation: str) -> metrics.Counter:
-    return metrics.Counter(name, documentation, labelnames=[PROC_LABEL_KEY], registry=a_registry)
+def _sync_create_counter(a_registry: registry.CollectorRegistry, name: str,
+                         documentation: str, labelnames: iter = None) -> metrics.Counter:
+    allnames = [PROC_LABEL_KEY]
+    if labelnames:
+        allnames.extend(labelnames)
+    return metrics.Counter(name, documentation, labelnames=allnames, registry=a_registry)
 
 
 def _sync_reset_counter(counter: metrics.Counter, instance: str):
     counter.labels(instance).reset()
 
 
-def _sync_inc_counter(counter: metrics.Counter, instance: str, amount: float = 1):
-    counter.labels(instance).inc(amount)
+def _sync_inc_counter(counter: metrics.Counter, instance: str, amount: float = 1, labelvalues: iter = None):
+    allvalues = [instance]
+    if labelvalues:
+        allvalues.extend(labelvalues)
+    counter.labels(*allvalues).inc(amount)
 
 
 create_process_collector = funcutil.to_async(_sync_create_process_collector)
@@ -3,11 +3,15 @@ import logging
 import abc
 import typing
 import inspect
+import enum
 import time
 # ALLOW util.*
 
 
 class Message:
+    __slots__ = ('_created', '_source', '_name', '_data', '_reply_to', '_derived')
+    _clock: typing.Callable[[], float] = time.time
+    _clock_offset: float = 0.0
 
     @staticmethod
     def from_vargs(*vargs):
@@ -15,13 +19,22 @@ class Message:
             return vargs[0]
         return Message(*vargs)
 
+    @staticmethod
+    def use_monotonic_clock(monotonic: bool = True):
+        # Monotonic timestamps keep their order across wall clock changes, created() stays in epoch seconds
+        if monotonic:
+            Message._clock, Message._clock_offset = time.monotonic, time.time() - time.monotonic()
+        else:
+            Message._clock, Message._clock_offset = time.time, 0.0
+
     def __init__(self, source: typing.Any, name: str, data: typing.Any = None,
                  reply_to: typing.Optional[Message] = None):
-        self._created = time.time()
+        self._created = Message._clock() + Message._clock_offset
         self._source = source
         self._name = name
         self._data = data
         self._reply_to = reply_to
+        self._derived: typing.Optional[dict] = None
 
     def created(self):
         return self._created
@@ -38,6 +51,23 @@ class Message:
     def reply_to(self):
         return self._reply_to
 
+    def derived(self) -> typing.Optional[dict]:
+        return self._derived
+
+    def add_derived(self, key: typing.Any, value: typing.Any):
+        if self._derived is None:
+            self._derived = {key: value}
+        else:
+            self._derived[key] = value
+
+    def derive(self, derivation: typing.Callable[[Message], typing.Any]) -> typing.Any:
+        derived = self._derived
+        if derived is not None and derivation in derived:
+            return derived[derivation]
+        value = derivation(self)
+        self.add_derived(derivation, value)
+        return value
+
 
 STOP = Message(Message, 'msgabc.STOP')
 
@@ -53,6 +83,9 @@ class Filter(metaclass=abc.ABCMeta):
     def accepts(self, message: Message) -> bool:
         pass
 
+    def names(self) -> typing.Optional[typing.AbstractSet[str]]:
+        return None  # Any name could be accepted, None means cannot be indexed by name
+
 
 class Handler(metaclass=abc.ABCMeta):
     @abc.abstractmethod
@@ -60,8 +93,34 @@ class Handler(metaclass=abc.ABCMeta):
         pass
 
 
+class BatchHandler(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def handle_batch(self, messages: typing.Sequence[Message]) -> typing.Any:
+        pass
+
+    def batch_size(self) -> int:
+        return 100
+
+    def batch_window(self) -> float:
+        return 0.0
+
+
 class Subscriber(Filter, Handler, metaclass=abc.ABCMeta):
-    pass
+    def expired(self) -> bool:
+        return False  # Expired subscribers are swept without waiting for a message
+
+
+class OverflowPolicy(enum.Enum):
+    BLOCK = enum.auto()
+    DROP_OLDEST = enum.auto()
+    DROP_NEWEST = enum.auto()
+    COALESCE = enum.auto()
+
+
+class Bounded(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def queue_limits(self) -> typing.Tuple[int, OverflowPolicy]:
+        pass
 
 
 class Mailer(metaclass=abc.ABCMeta):
@@ -69,12 +128,20 @@ class Mailer(metaclass=abc.ABCMeta):
     def post(self, *vargs) -> bool:
         pass
 
+    def backlog(self) -> int:
+        return 0  # Number of posted messages waiting to be handled, if known
+
 
 class MulticastMailer(Mailer, metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def register(self, subscriber: Subscriber) -> Mailer:
         pass
 
+    # noinspection PyUnusedLocal
+    # pylint: disable=unused-argument
+    def correlate(self, request: Message) -> typing.Optional[typing.Awaitable[Message]]:
+        return None  # Not supported, requester must catch the reply with a subscriber
+
 
 class Catcher(Subscriber, metaclass=abc.ABCMeta):
     @abc.abstractmethod
@@ -93,9 +160,15 @@ class AbcSubscriber(Subscriber):
     def __init__(self, msg_filter: Filter):
         self._msg_filter = msg_filter
 
+    def msg_filter(self) -> Filter:
+        return self._msg_filter
+
     def accepts(self, message):
         return self._msg_filter.accepts(message)
 
+    def names(self):
+        return self._msg_filter.names()
+
     async def handle(self, message):
         raise NotImplementedError()
 
@@ -110,3 +183,15 @@ async def try_handle(handler: Handler, message: Message) -> typing.Any:
         logging.error('try_handle() %s', repr(e))
         result = e
     return result
+
+
+async def try_handle_batch(handler: BatchHandler, messages: typing.Sequence[Message]) -> typing.Any:
+    try:
+        if inspect.iscoroutinefunction(handler.handle_batch):
+            result = await handler.handle_batch(messages)
+        else:
+            result = handler.handle_batch(messages)
+    except Exception as e:
+        logging.error('try_handle_batch() %s', repr(e))
+        result = e
+    return result
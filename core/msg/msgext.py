@@ -1,7 +1,6 @@
 import asyncio
 import enum
 import logging
-import collections
 import typing
 # ALLOW util.* msg.*
 from core.util import aggtrf, tasks, util, funcutil
@@ -18,6 +17,10 @@ class SynchronousMessenger:
 
     async def request(self, *vargs) -> typing.Union[None, msgabc.Message, typing.Collection[msgabc.Message]]:
         message = msgabc.Message.from_vargs(*vargs)
+        reply = None if self._catcher else self._mailer.correlate(message)
+        if reply is not None:
+            self._mailer.post(message)
+            return await asyncio.wait_for(reply, self._timeout)
         catcher = self._catcher if self._catcher else SingleCatcher(msgftr.ReplyToIs(message), self._timeout)
         self._mailer.register(catcher)
         self._mailer.post(message)
@@ -54,6 +57,9 @@ class MultiCatcher(msgabc.Catcher):
         finally:
             self._expired = True
 
+    def expired(self):
+        return self._expired
+
     def accepts(self, message):
         return self._expired \
             or self._catch_filter.accepts(message) \
@@ -97,6 +103,9 @@ class SingleCatcher(msgabc.Catcher):
         messages = await self._catcher.get()
         return util.single(messages)
 
+    def expired(self):
+        return self._catcher.expired()
+
     def accepts(self, message):
         return self._catcher.accepts(message)
 
@@ -109,9 +118,11 @@ class SingleCatcher(msgabc.Catcher):
 
 class Publisher:
     START, END = 'Publisher.Start', 'Publisher.End'
+    BACKLOG_INTERVAL, BACKLOG_POLL = 32, 0.01
 
-    def __init__(self, mailer: msgabc.Mailer, producer: msgabc.Producer):
+    def __init__(self, mailer: msgabc.Mailer, producer: msgabc.Producer, high_water: int = 0, low_water: int = 0):
         self._mailer, self._producer = mailer, producer
+        self._high_water, self._low_water = high_water, low_water
         self._task = tasks.task_start(self._run(), producer)
         self._mailer.post(self, Publisher.START, producer)
 
@@ -119,7 +130,7 @@ class Publisher:
         await tasks.wait_for(self._task, 3.0)
 
     async def _run(self):
-        running = True
+        running, posted = True, 0
         while running:
             message = None
             try:
@@ -127,9 +138,19 @@ class Publisher:
             except Exception as e:
                 logging.error('Publishing exception. raised: %s', e)
             running = False if message is None else self._mailer.post(message)
+            posted += 1
+            if self._high_water and posted % Publisher.BACKLOG_INTERVAL == 0:
+                await self._relieve()
         self._mailer.post(self, Publisher.END, self._producer)
         tasks.task_end(self._task)
 
+    async def _relieve(self):
+        if self._mailer.backlog() < self._high_water:
+            return
+        logging.debug('Publisher paused for backlog: %s', repr(self._producer))
+        while self._mailer.backlog() > self._low_water:
+            await asyncio.sleep(Publisher.BACKLOG_POLL)
+
 
 class SyncReply(enum.Enum):
     AT_START = enum.auto()
@@ -164,34 +185,54 @@ class RelaySubscriber(msgabc.AbcSubscriber):
         return None if self._mailer.post(message) else True
 
 
-class RollingLogSubscriber(msgabc.Subscriber):
-    REQUEST, RESPONSE = 'RollingLogSubscriber.Request', 'RollingLogSubscriber.Response'
+class RingBuffer:
+
+    def __init__(self, size: int):
+        self._size, self._items, self._sequence = size, [None] * size, 0
+
+    def size(self) -> int:
+        return self._size
+
+    def sequence(self) -> int:
+        return self._sequence
+
+    def append(self, item: typing.Any):
+        self._items[self._sequence % self._size] = item
+        self._sequence += 1
+
+    def since(self, sequence: int = 0) -> typing.List[typing.Any]:
+        start = max(sequence, self._sequence - self._size, 0)
+        if start >= self._sequence:
+            return []
+        head, tail = start % self._size, self._sequence % self._size
+        if head < tail:
+            return self._items[head:tail]
+        return self._items[head:] + self._items[:tail]
 
-    def __init__(self, mailer: msgabc.MulticastMailer, size: int = 20,
+
+class RollingLogSubscriber(msgabc.AbcSubscriber, msgabc.BatchHandler):
+
+    def __init__(self, size: int = 20,
                  msg_filter: msgabc.Filter = msgftr.AcceptAll(),
                  transformer: msgabc.Transformer = msgtrf.Noop(),
                  aggregator: aggtrf.Aggregator = aggtrf.Noop()):
-        self._mailer, self._size = mailer, size
+        super().__init__(msg_filter)
         self._transformer, self._aggregator = transformer, aggregator
-        self._request_filter = msgftr.And(msgftr.SourceIs(self), msgftr.NameIs(RollingLogSubscriber.REQUEST))
-        self._msg_filter = msgftr.Or(msg_filter, self._request_filter)
-        self._container = collections.deque()
+        self._buffer = RingBuffer(size)
 
-    async def get(self) -> typing.Any:
-        response = await SynchronousMessenger(self._mailer).request(self, RollingLogSubscriber.REQUEST)
-        return response.data()
+    def get(self) -> typing.Any:
+        return self._aggregator.aggregate(tuple(self._buffer.since()))
 
-    def accepts(self, message):
-        return self._msg_filter.accepts(message)
+    def since(self, sequence: int) -> typing.Tuple[int, typing.List[typing.Any]]:
+        return self._buffer.sequence(), self._buffer.since(sequence)
 
     def handle(self, message):
-        if self._request_filter.accepts(message):
-            result = self._aggregator.aggregate(tuple(self._container))
-            self._mailer.post(self, RollingLogSubscriber.RESPONSE, result, message)
-        else:
-            self._container.append(self._transformer.transform(message))
-            while len(self._container) > self._size:
-                self._container.popleft()
+        self._buffer.append(self._transformer.transform(message))
+        return None
+
+    def handle_batch(self, messages):
+        for message in messages:
+            self._buffer.append(self._transformer.transform(message))
         return None
 
 
@@ -1,4 +1,5 @@
 import re
+import typing
 # ALLOW util.* msg.msgabc
 from core.util import util
 from core.msg import msgabc
@@ -15,12 +16,18 @@ class AcceptNothing(msgabc.Filter):
     def accepts(self, message):
         return False
 
+    def names(self):
+        return frozenset()
+
 
 class IsStop(msgabc.Filter):
 
     def accepts(self, message):
         return message is msgabc.STOP
 
+    def names(self):
+        return frozenset()  # STOP is always delivered to every mailer
+
 
 class Not(msgabc.Filter):
 
@@ -43,6 +50,14 @@ class And(msgabc.Filter):
                 return False
         return True
 
+    def names(self):
+        result = None
+        for msg_filter in self._msg_filters:
+            names = msg_filter.names()
+            if names is not None:
+                result = names if result is None else result & names
+        return result
+
 
 class Or(msgabc.Filter):
 
@@ -56,6 +71,15 @@ class Or(msgabc.Filter):
                 return True
         return False
 
+    def names(self):
+        result = frozenset()
+        for msg_filter in self._msg_filters:
+            names = msg_filter.names()
+            if names is None:
+                return None
+            result = result | names
+        return result
+
 
 class SourceIs(msgabc.Filter):
 
@@ -83,6 +107,9 @@ class NameIs(msgabc.Filter):
     def accepts(self, message):
         return self._name is message.name()
 
+    def names(self):
+        return frozenset((self._name,))
+
 
 class NameIn(msgabc.Filter):
 
@@ -93,6 +120,9 @@ class NameIn(msgabc.Filter):
     def accepts(self, message):
         return message.name() in self._names
 
+    def names(self):
+        return frozenset(self._names)
+
 
 class NameEquals(msgabc.Filter):
 
@@ -102,6 +132,9 @@ class NameEquals(msgabc.Filter):
     def accepts(self, message):
         return self._name == message.name()
 
+    def names(self):
+        return frozenset((self._name,))
+
 
 class HasData(msgabc.Filter):
 
@@ -137,21 +170,25 @@ class DataStrContains(msgabc.Filter):
         self._ignore_case = ignore_case
 
     def accepts(self, message):
-        data = message.data()
+        data = message.derive(_lower_data) if self._ignore_case else message.data()
         if not isinstance(data, str):
             return False
-        if self._ignore_case:
-            data = data.lower()
         return data.find(self._value) != -1
 
 
+def _lower_data(message: msgabc.Message) -> str | None:
+    data = message.data()
+    return data.lower() if isinstance(data, str) else None
+
+
 class DataMatches(msgabc.Filter):
 
     def __init__(self, regex: str | re.Pattern):
         self._pattern = regex if isinstance(regex, re.Pattern) else re.compile(regex)
+        self._literal = _required_literal(self._pattern)
 
     def accepts(self, message):
-        return self._pattern.match(str(message.data())) is not None
+        return _match(message, self._pattern, self._literal) is not None
 
     def find_all(self, value: str) -> tuple | None:
         result = util.single(self._pattern.findall(value))
@@ -168,3 +205,292 @@ class DataIsInstance(msgabc.Filter):
 
     def accepts(self, message):
         return isinstance(message.data(), self._clazz)
+
+
+def _match(message: msgabc.Message, pattern: re.Pattern, literal: str | None) -> re.Match | None:
+    data = message.data()
+    data = data if isinstance(data, str) else str(data)
+    if literal is not None and literal not in data:
+        return None
+    derived = message.derived()
+    if derived is not None and pattern in derived:
+        return derived[pattern]
+    match = pattern.match(data)
+    message.add_derived(pattern, match)
+    return match
+
+
+_INLINE_FLAGS, _QUANTIFIER = re.compile(r'\(\?[aiLmsux-]'), re.compile(r'\{\d*,?\d*\}')
+
+
+def _required_literal(pattern: re.Pattern) -> str | None:
+    regex = pattern.pattern
+    if not isinstance(regex, str) or pattern.flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+    if _INLINE_FLAGS.search(regex):
+        return None
+    runs, run, depth, index, length = [], [], 0, 0, len(regex)
+    while index < length:
+        char, literal = regex[index], None
+        index += 1
+        quantifier = _QUANTIFIER.match(regex, index - 1) if char == '{' else None
+        if char == '\\' and index < length:
+            index, literal = _escape(regex, index)
+        elif char == '[':
+            index = _skip_char_class(regex, index)
+        elif char in '()':
+            depth += 1 if char == '(' else -1
+        elif char == '|' and depth == 0:
+            return None
+        elif char in '*?' or quantifier:
+            index = quantifier.end() if quantifier else index
+            if run and depth == 0:
+                run.pop()
+        elif char not in '.^$+|':
+            literal = char
+        if literal is not None and depth == 0:
+            run.append(literal)
+        else:
+            runs.append(''.join(run))
+            run = []
+    runs.append(''.join(run))
+    literal = max(runs, key=len)
+    return literal if literal else None
+
+
+_ESCAPE_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def _escape(regex: str, index: int) -> typing.Tuple[int, str | None]:
+    char, length = regex[index], len(regex)
+    index += 1
+    if not char.isalnum():
+        return index, char
+    if char in _ESCAPE_LENGTHS:  # Payload is skipped, escaped characters end the literal run
+        return min(index + _ESCAPE_LENGTHS[char], length), None
+    if char == 'N' and index < length and regex[index] == '{':
+        end = regex.find('}', index)
+        return (length if end == -1 else end + 1), None
+    if char.isdigit():
+        end = index
+        while end < length and end - index < 2 and regex[end].isdigit():
+            end += 1
+        return end, None
+    return index, None
+
+
+def _skip_char_class(regex: str, index: int) -> int:
+    length = len(regex)
+    if index < length and regex[index] == '^':
+        index += 1
+    if index < length and regex[index] == ']':
+        index += 1
+    while index < length and regex[index] != ']':
+        index += 2 if regex[index] == '\\' else 1
+    return index + 1
+
+
+class Compiled(msgabc.Filter):
+
+    def __init__(self, msg_filter: msgabc.Filter):
+        self._msg_filter = msg_filter
+        self._accepts = compile_filter(msg_filter)
+
+    def accepts(self, message):
+        return self._accepts(message)
+
+    def names(self):
+        return self._msg_filter.names()
+
+
+def compile_filter(msg_filter: msgabc.Filter) -> typing.Callable[[msgabc.Message], bool]:
+    return _build(_optimise(msg_filter))
+
+
+_IDENTITY_FILTERS = (NameIs, SourceIs, ReplyToIs)
+_COSTS = {
+    AcceptAll: 0, AcceptNothing: 0, IsStop: 0, NameIs: 0, SourceIs: 0, ReplyToIs: 0,
+    NameIn: 1, NameEquals: 1, HasData: 2, DataEquals: 2, DataIsInstance: 2,
+    DataStrStartsWith: 3, DataStrContains: 3, DataMatches: 4}
+_COST_UNKNOWN = 5  # Unknown filters may have side effects or rely on guards, so they are never hoisted
+
+
+def _cost(msg_filter: msgabc.Filter) -> int:
+    clazz = type(msg_filter)
+    if clazz is Not:
+        return _cost(msg_filter._msg_filter)
+    if clazz in (And, Or):
+        costs = [_cost(o) for o in msg_filter._msg_filters]
+        if _COST_UNKNOWN in costs:
+            return _COST_UNKNOWN
+        return min(costs) if clazz is And else max(costs)
+    return util.get(clazz, _COSTS, _COST_UNKNOWN)
+
+
+def _key(msg_filter: msgabc.Filter) -> typing.Any:
+    clazz = type(msg_filter)
+    if clazz in _IDENTITY_FILTERS:
+        return clazz, tuple(id(o) for o in vars(msg_filter).values())
+    if clazz in _COSTS:
+        try:
+            key = clazz, tuple(vars(msg_filter).items())
+            hash(key)
+            return key
+        except TypeError:
+            pass
+    return id(msg_filter)
+
+
+def _flatten(clazz: type, msg_filters: typing.Iterable[msgabc.Filter]) -> typing.List[msgabc.Filter]:
+    result = []
+    for msg_filter in msg_filters:
+        msg_filter = _optimise(msg_filter)
+        if isinstance(msg_filter, clazz):
+            result.extend(msg_filter._msg_filters)
+        else:
+            result.append(msg_filter)
+    return result
+
+
+def _merge_names(msg_filters: typing.List[msgabc.Filter]) -> typing.List[msgabc.Filter]:
+    names, result, index = [], [], -1
+    for msg_filter in msg_filters:
+        clazz = type(msg_filter)
+        if clazz in (NameIn, NameEquals):
+            if index == -1:
+                index = len(result)
+                result.append(msg_filter)
+            names.extend(msg_filter._names if clazz is NameIn else (msg_filter._name,))
+        else:
+            result.append(msg_filter)
+    names = tuple(dict.fromkeys(names))
+    if len(names) > 1:
+        result[index] = NameIn(*names)
+    return result
+
+
+def _optimise(msg_filter: msgabc.Filter) -> msgabc.Filter:
+    clazz = type(msg_filter)
+    if clazz is Not:
+        inner = _optimise(msg_filter._msg_filter)
+        inner_clazz = type(inner)
+        if inner_clazz is Not:
+            return inner._msg_filter
+        if inner_clazz is AcceptAll:
+            return AcceptNothing()
+        if inner_clazz is AcceptNothing:
+            return AcceptAll()
+        return Not(inner)
+    if clazz not in (And, Or):
+        return msg_filter
+    absorbing, neutral = (AcceptNothing, AcceptAll) if clazz is And else (AcceptAll, AcceptNothing)
+    children, keys = [], set()
+    for child in _flatten(clazz, msg_filter._msg_filters):
+        child_clazz, key = type(child), _key(child)
+        if child_clazz is absorbing:
+            return child
+        if child_clazz is not neutral and key not in keys:
+            keys.add(key)
+            children.append(child)
+    if clazz is Or:
+        children = _merge_names(children)
+    children.sort(key=_cost)
+    if not children:
+        return neutral()
+    if len(children) == 1:
+        return children[0]
+    return clazz(*children)
+
+
+def _build_name_is(msg_filter: NameIs) -> typing.Callable[[msgabc.Message], bool]:
+    name = msg_filter._name
+
+    def name_is(message):
+        return message.name() is name
+    return name_is
+
+
+def _build_name_in(msg_filter: NameIn) -> typing.Callable[[msgabc.Message], bool]:
+    try:
+        names = frozenset(msg_filter._names)
+    except TypeError:
+        return msg_filter.accepts
+
+    def name_in(message):
+        return message.name() in names
+    return name_in
+
+
+def _build_data_str_contains(msg_filter: DataStrContains) -> typing.Callable[[msgabc.Message], bool]:
+    value = msg_filter._value
+    if msg_filter._ignore_case:
+        def data_str_contains_ignore_case(message):
+            data = message.derive(_lower_data)
+            return data is not None and value in data
+        return data_str_contains_ignore_case
+
+    def data_str_contains(message):
+        data = message.data()
+        return isinstance(data, str) and value in data
+    return data_str_contains
+
+
+def _build_data_matches(msg_filter: DataMatches) -> typing.Callable[[msgabc.Message], bool]:
+    pattern, literal = msg_filter._pattern, msg_filter._literal
+
+    def data_matches(message):
+        return _match(message, pattern, literal) is not None
+    return data_matches
+
+
+def _build_not(msg_filter: Not) -> typing.Callable[[msgabc.Message], bool]:
+    predicate = _build(msg_filter._msg_filter)
+
+    def not_predicate(message):
+        return not predicate(message)
+    return not_predicate
+
+
+def _build_and(msg_filter: And) -> typing.Callable[[msgabc.Message], bool]:
+    predicates = tuple(_build(o) for o in msg_filter._msg_filters)
+    if len(predicates) == 2:
+        first, second = predicates
+
+        def and_pair(message):
+            return first(message) and second(message)
+        return and_pair
+
+    def and_all(message):
+        for predicate in predicates:
+            if not predicate(message):
+                return False
+        return True
+    return and_all
+
+
+def _build_or(msg_filter: Or) -> typing.Callable[[msgabc.Message], bool]:
+    predicates = tuple(_build(o) for o in msg_filter._msg_filters)
+    if len(predicates) == 2:
+        first, second = predicates
+
+        def or_pair(message):
+            return first(message) or second(message)
+        return or_pair
+
+    def or_any(message):
+        for predicate in predicates:
+            if predicate(message):
+                return True
+        return False
+    return or_any
+
+
+_BUILDERS = {
+    NameIs: _build_name_is, NameIn: _build_name_in,
+    DataStrContains: _build_data_str_contains, DataMatches: _build_data_matches,
+    Not: _build_not, And: _build_and, Or: _build_or}
+
+
+def _build(msg_filter: msgabc.Filter) -> typing.Callable[[msgabc.Message], bool]:
+    builder = util.get(type(msg_filter), _BUILDERS)
+    return builder(msg_filter) if builder else msg_filter.accepts
@@ -1,11 +1,15 @@
 import logging
 import time
 import typing
-import aiofiles
+import asyncio
+import os
+import re
 # ALLOW util.* msg.msgabc msg.msgftr msg.msgtrf
-from core.util import util, dtutil, io, funcutil
+from core.util import util, dtutil, io, tasks, funcutil, pack
 from core.msg import msgabc, msgftr, msgtrf
 
+INDEX_SUFFIX = '.idx'
+
 
 class LogPublisher:
     LOG = 'LogPublisher.Log'
@@ -29,37 +33,250 @@ class LogPublisher:
         self._mailer.post(source if source else self._source, name if name else self._name, msg)
 
 
-class LogfileSubscriber(msgabc.AbcSubscriber):
+class LogfileSubscriber(msgabc.AbcSubscriber, msgabc.BatchHandler, msgabc.Bounded):
+    FLUSH_SIZE, FLUSH_INTERVAL, QUEUE_SIZE = 65536, 0.5, 10000
 
     def __init__(self, filename: str,
                  msg_filter: msgabc.Filter = msgftr.AcceptAll(),
                  roll_filter: msgabc.Filter = msgftr.AcceptNothing(),
-                 transformer: msgabc.Transformer = msgtrf.ToLogLine()):
+                 transformer: msgabc.Transformer = msgtrf.ToLogLine(),
+                 batch_size: int = 100,
+                 flush_size: int = FLUSH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 max_size: int = 0,
+                 max_age: float = 0.0,
+                 compress: str | None = None,
+                 retain: int = 0,
+                 index_interval: float = 0.0,
+                 queue_size: int = QUEUE_SIZE):
         super().__init__(msgftr.Or(msg_filter, roll_filter, msgftr.IsStop()))
-        self._filename, self._file = filename, None
+        self._queue_size = queue_size
+        self._writer = _LogWriter(filename, max_size, max_age, index_interval > 0.0)
+        self._compress, self._retain, self._archivers = compress, retain, []
         self._roll_filter, self._transformer = roll_filter, transformer
+        self._batch_size, self._flush_size, self._flush_interval = batch_size, flush_size, flush_interval
+        self._index_interval, self._bucket = index_interval, None
+        self._lines, self._marks, self._size, self._created = [], [], 0, None
+        self._lock, self._pending, self._flusher, self._failed = asyncio.Lock(), asyncio.Event(), None, False
+
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    def queue_limits(self) -> typing.Tuple[int, msgabc.OverflowPolicy]:
+        return self._queue_size, msgabc.OverflowPolicy.DROP_NEWEST  # Never stall the dispatcher on a slow disk
 
     async def handle(self, message):
         if message is msgabc.STOP:
-            await funcutil.silently_cleanup(self._file)
+            await self._stop_flusher()
+            await self._flush(close=True)
+            await asyncio.gather(*self._archivers)
             return True
-        if self._roll_filter.accepts(message):
-            await funcutil.silently_cleanup(self._file)
-            self._file = None
-            return None
+        return await self.handle_batch((message,))
+
+    async def handle_batch(self, messages):
+        if self._failed:
+            return await self._fail()
+        for message in messages:
+            if self._roll_filter.accepts(message):
+                if not await self._flush(close=True):
+                    return await self._fail()
+            else:
+                line, created = self._transformer.transform(message), message.created()
+                if not self._lines:
+                    self._created = created
+                    self._pending.set()
+                if self._index_interval > 0.0:
+                    bucket = int(created // self._index_interval)
+                    if bucket != self._bucket:
+                        self._bucket = bucket
+                        self._marks.append((created, len(self._lines)))
+                self._lines.append(line)
+                self._size += len(line) + 1
+        if self._size >= self._flush_size:
+            return None if await self._flush() else await self._fail()
+        if self._lines and self._flusher is None:
+            self._flusher = tasks.task_start(self._flush_later(), self)
+        return None
+
+    async def _fail(self) -> bool:
+        self._failed = True
+        await self._stop_flusher()
+        return False
+
+    async def _stop_flusher(self):
+        flusher, self._flusher = self._flusher, None
+        if flusher:
+            async with self._lock:  # Wait for any flush in progress before cancelling
+                flusher.cancel()
+            await asyncio.wait((flusher,))
+            tasks.task_end(flusher)
+
+    async def _flush_later(self):
         try:
-            if self._file is None:
-                filename = dtutil.format_time(self._filename, message.created())
-                self._file = await aiofiles.open(filename, mode='w')
-            await self._file.write(self._transformer.transform(message))
-            await self._file.write('\n')
-            await self._file.flush()
-            return None
-        except Exception as e:
-            await funcutil.silently_cleanup(self._file)
-            logging.error('LogfileSubscriber raised: %s', repr(e))
+            while not self._failed:
+                await self._pending.wait()
+                await asyncio.sleep(self._flush_interval)
+                if not await self._flush():
+                    self._failed = True
+        except asyncio.CancelledError:
+            pass
+
+    async def _flush(self, close: bool = False) -> bool:
+        async with self._lock:
+            lines, marks, created = self._lines, self._marks, self._created
+            self._lines, self._marks, self._size, self._created = [], [], 0, None
+            self._pending.clear()
+            if not lines and not close:
+                return True
+            try:
+                rotated = await asyncio.to_thread(self._writer.write, lines, marks, created, close)
+                if rotated:
+                    self._archivers.append(tasks.task_start(self._archive(rotated), 'LogfileSubscriber.Archiver'))
+                return True
+            except Exception as e:
+                await asyncio.to_thread(self._writer.close)
+                logging.error('LogfileSubscriber raised: %s', repr(e))
         return False
 
+    async def _archive(self, path: str):
+        task = asyncio.current_task()
+        try:
+            if self._compress:
+                path = await pack.compress_file(path, self._compress)
+            if self._retain > 0:
+                await asyncio.to_thread(_prune_rotated, path, self._retain)
+        except Exception as e:
+            logging.error('LogfileSubscriber archive %s raised: %s', path, repr(e))
+        self._archivers.remove(task)
+        tasks.task_end(task)
+
+
+class _LogWriter:
+    ROTATED_STAMP = '%Y%m%d-%H%M%S'
+
+    def __init__(self, filename: str, max_size: int, max_age: float, indexed: bool):
+        self._filename, self._max_size, self._max_age, self._indexed = filename, max_size, max_age, indexed
+        self._file, self._index, self._path, self._size, self._opened = None, None, None, 0, 0.0
+        self._stamp, self._sequence = None, 0
+
+    def write(self, lines: typing.List[str], marks: typing.List[typing.Tuple[float, int]],
+              created: float | None, close: bool) -> str | None:
+        rotated = None
+        if lines:
+            if self._file is None:
+                self._path = dtutil.format_time(self._filename, created)
+                self._file = open(self._path, mode='wb')  # pylint: disable=consider-using-with
+                if self._indexed:
+                    self._index = open(self._path + INDEX_SUFFIX, mode='w', encoding='utf-8')  # pylint: disable=consider-using-with
+                    if not marks or marks[0][1] > 0:
+                        marks.insert(0, (created, 0))
+                self._size, self._opened = 0, time.time()
+            self._write(lines, marks if self._indexed else ())
+            if 0 < self._max_size <= self._size or 0.0 < self._max_age <= time.time() - self._opened:
+                rotated = self._rotate()
+        if close:
+            self.close()
+        return rotated
+
+    def _write(self, lines: typing.List[str], marks: typing.Iterable[typing.Tuple[float, int]]):
+        chunks, entries, start = [], [], 0
+        for created, end in marks:
+            if end > start:
+                chunks.append(('\n'.join(lines[start:end]) + '\n').encode())
+                self._size, start = self._size + len(chunks[-1]), end
+            entries.append(f'{created:.3f} {self._size}\n')
+        chunks.append(('\n'.join(lines[start:]) + '\n').encode())
+        self._size += len(chunks[-1])
+        self._file.write(b''.join(chunks))
+        self._file.flush()
+        if entries:
+            self._index.write(''.join(entries))
+            self._index.flush()
+
+    def _rotate(self) -> str:
+        self.close()
+        stamp = dtutil.format_time(_LogWriter.ROTATED_STAMP, time.time())
+        sequence = self._sequence + 1 if stamp == self._stamp else 0
+        target = self._path + '.' + stamp + ('_' + str(sequence) if sequence else '')
+        while os.path.exists(target) or any(os.path.exists(target + '.' + e) for e in pack.COMPRESSIONS):
+            sequence += 1
+            target = self._path + '.' + stamp + '_' + str(sequence)
+        self._stamp, self._sequence = stamp, sequence
+        os.rename(self._path, target)
+        if self._indexed:
+            os.rename(self._path + INDEX_SUFFIX, target + INDEX_SUFFIX)
+        return target
+
+    def close(self):
+        file, index, self._file, self._index = self._file, self._index, None, None
+        if index:
+            index.close()
+        if file:
+            file.close()
+
+
+_ROTATED_REGEX = re.compile(r'\.([0-9]{8}-[0-9]{6})(?:_([0-9]+))?(?:\.[a-z]+)?$')
+
+
+def _prune_rotated(path: str, retain: int):
+    directory, rotated = os.path.dirname(path) or '.', {}
+    for name in os.listdir(directory):
+        match = _ROTATED_REGEX.search(name)
+        if match:  # Rotated log and its index share a key, so they are retained or removed together
+            rotated.setdefault((match.group(1), int(match.group(2) or 0)), []).append(name)
+    for key in sorted(rotated)[:-retain]:
+        for name in rotated[key]:
+            os.remove(os.path.join(directory, name))
+
+
+def _sync_search_logfile(path: str, start: float | None, end: float | None,
+                         line_filter: typing.Callable[[str], bool] | None, limit: int) -> typing.List[str]:
+    begin, stop = _indexed_range(path, start, end)
+    result, position = [], begin
+    compression = _compression(path)
+    opener = pack.COMPRESSIONS[compression] if compression else open
+    with opener(path, mode='rb') as file:
+        file.seek(begin)
+        for raw in file:
+            if stop is not None and position >= stop:
+                break
+            position += len(raw)
+            line = raw.decode(errors='replace').rstrip('\r\n')
+            if line_filter is None or line_filter(line):
+                result.append(line)
+                if len(result) >= limit:
+                    break
+    return result
+
+
+def _indexed_range(path: str, start: float | None, end: float | None) -> typing.Tuple[int, int | None]:
+    begin, stop = 0, None
+    if start is None and end is None:
+        return begin, stop
+    index_path = (os.path.splitext(path)[0] if _compression(path) else path) + INDEX_SUFFIX
+    if not os.path.isfile(index_path):
+        raise ValueError('No index for time bounded search of ' + path)
+    with open(index_path, mode='r', encoding='utf-8') as index:
+        for entry in index:
+            parts = entry.split()
+            if len(parts) != 2:
+                continue
+            created, offset = float(parts[0]), int(parts[1])
+            if start is not None and created <= start:
+                begin = offset
+            if end is not None and created > end:
+                stop = offset
+                break
+    return begin, stop
+
+
+def _compression(path: str) -> str | None:
+    extension = os.path.splitext(path)[1][1:]
+    return extension if extension in pack.COMPRESSIONS else None
+
+
+search_logfile = funcutil.to_async(_sync_search_logfile)
+
 
 class LoggerSubscriber(msgabc.AbcSubscriber):
 
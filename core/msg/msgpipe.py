@@ -1,6 +1,12 @@
 import logging
 import typing
+import re
+import os
+import time
+import ctypes
+import struct
 import asyncio
+import collections
 from asyncio import streams
 # ALLOW util.* msg*.* context.*
 from core.util import funcutil, io, linenc, tasks
@@ -8,11 +14,14 @@ from core.msg import msgabc, msgext
 
 
 class PipeOutLineProducer(msgabc.Producer):
+    CHUNK_SIZE, LINE_LIMIT = 65536, 65536
 
     def __init__(self, mailer: msgabc.Mailer, source: typing.Any, name: str,
-                 pipe: streams.StreamReader, decoder: linenc.LineDecoder = linenc.DefaultLineDecoder()):
+                 pipe: streams.StreamReader, decoder: linenc.LineDecoder = linenc.DefaultLineDecoder(),
+                 chunk_size: int = 0, high_water: int = 0, low_water: int = 0):
         self._source, self._name, self._pipe, self._decoder = source, name, pipe, decoder
-        self._publisher = msgext.Publisher(mailer, self)
+        self._chunk_size, self._lines, self._partial = chunk_size, collections.deque(), b''
+        self._publisher = msgext.Publisher(mailer, self, high_water, low_water)
 
     async def close(self):
         await funcutil.silently_cleanup(self._pipe)
@@ -20,8 +29,8 @@ class PipeOutLineProducer(msgabc.Producer):
 
     async def next_message(self):
         try:
-            line = await self._pipe.readline()
-            if io.end_of_stream(line):
+            line = await self._next_chunked_line() if self._chunk_size else await self._next_line()
+            if line is None:
                 logging.debug('EOF read from PipeOut: %s', repr(self._pipe))
                 return None
             return msgabc.Message(self._source, self._name, self._decoder.decode(line))
@@ -29,40 +38,287 @@ class PipeOutLineProducer(msgabc.Producer):
             logging.error('Pipe read line failed: %s', repr(e))
         return None
 
+    async def _next_line(self) -> bytes | None:
+        line = await self._pipe.readline()
+        return None if io.end_of_stream(line) else line
 
-class TailPublisher:
+    async def _next_chunked_line(self) -> bytes | None:
+        while not self._lines:
+            chunk = await self._pipe.read(self._chunk_size)
+            if io.end_of_stream(chunk):
+                line, self._partial = self._partial, b''
+                return line if line else None
+            self._partial = _split_lines(self._lines, self._partial + chunk)
+        return self._lines.popleft()
 
-    def __init__(self, mailer: msgabc.Mailer, source: typing.Any, name: str, path: str):
+
+def _split_lines(lines: typing.Deque[bytes], data: bytes) -> bytes:
+    split = data.split(b'\n')
+    partial = split.pop()
+    while len(partial) > PipeOutLineProducer.LINE_LIMIT:
+        index = _utf8_boundary(partial, PipeOutLineProducer.LINE_LIMIT)
+        split.append(partial[:index])
+        partial = partial[index:]
+    lines.extend(split)
+    return partial
+
+
+def _utf8_boundary(data: bytes, limit: int) -> int:
+    index = limit
+    while index > 0 and (data[index] & 0xC0) == 0x80:  # Don't split a multibyte character
+        index -= 1
+    return index if index > 0 else limit
+
+
+class LineLimiter(msgabc.Mailer):
+    SUPPRESSED = 'LineLimiter.Suppressed'
+    DUPLICATE = 'duplicate'
+    FLUSH_INTERVAL = 2.0
+
+    def __init__(self, mailer: msgabc.Mailer, collapse: bool = True,
+                 limits: typing.Iterable[typing.Tuple[str, float]] = (),
+                 flush_interval: float = FLUSH_INTERVAL):
+        self._mailer, self._collapse, self._flush_interval = mailer, collapse, flush_interval
+        self._limits = [_RateLimit(pattern, rate) for pattern, rate in limits]
+        self._last, self._repeated, self._flusher = None, 0, None
+
+    def backlog(self) -> int:
+        return self._mailer.backlog()
+
+    def post(self, *vargs) -> bool:
+        message = msgabc.Message.from_vargs(*vargs)
+        data = message.data()
+        if not isinstance(data, str):
+            self._flush(True)
+            return self._mailer.post(message)
+        last = self._last
+        if self._collapse and last is not None and data == last.data() and message.name() == last.name():
+            self._repeated += 1
+            self._flush_later()
+            return True
+        self._flush(False)
+        for limit in self._limits:
+            if limit.matches(data):
+                if not limit.take():
+                    self._flush_later()
+                    return True
+                self._report(message, limit.release(), limit.pattern())
+                break
+        self._last = message
+        return self._mailer.post(message)
+
+    def _flush_later(self):
+        if self._flusher is None and self._flush_interval > 0.0:
+            self._flusher = tasks.task_start(self._timed_flush(), self)
+
+    async def _timed_flush(self):
+        task = asyncio.current_task()
+        try:
+            await asyncio.sleep(self._flush_interval)  # Summaries are not held back while the stream is quiet
+            self._flusher = None
+            self._flush(True)
+        except asyncio.CancelledError:
+            pass
+        tasks.task_end(task)
+
+    def _flush(self, limits: bool):
+        if self._repeated:
+            repeated, self._repeated = self._repeated, 0
+            self._report(self._last, repeated, LineLimiter.DUPLICATE)
+        if limits:
+            for limit in self._limits:
+                self._report(self._last, limit.release(), limit.pattern())
+
+    def _report(self, message: typing.Optional[msgabc.Message], count: int, reason: str):
+        if not count:
+            return
+        if message:
+            if reason is LineLimiter.DUPLICATE:
+                text = f'Last line repeated {count} times'
+            else:
+                text = f'Suppressed {count} lines matching: {reason}'
+            self._mailer.post(message.source(), message.name(), text)
+        self._mailer.post(self, LineLimiter.SUPPRESSED, (reason, count))
+
+
+class _RateLimit:
+
+    def __init__(self, pattern: str, rate: float):
+        self._pattern, self._regex, self._rate = pattern, re.compile(pattern), rate
+        self._tokens, self._time, self._suppressed = rate, time.monotonic(), 0
+
+    def pattern(self) -> str:
+        return self._pattern
+
+    def matches(self, data: str) -> bool:
+        return self._regex.search(data) is not None
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self._rate, self._tokens + (now - self._time) * self._rate)
+        self._time = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self._suppressed += 1
+        return False
+
+    def release(self) -> int:
+        result, self._suppressed = self._suppressed, 0
+        return result
+
+
+class TailPublisher(msgabc.Producer):
+    TAIL_LINES, POLL_INTERVAL, WATCH_INTERVAL = 10, 0.5, 5.0
+
+    def __init__(self, mailer: msgabc.Mailer, source: typing.Any, name: str, path: str,
+                 decoder: linenc.LineDecoder = linenc.DefaultLineDecoder(), inotify: bool = True):
         self._mailer, self._source, self._name, self._path = mailer, source, name, path
-        self._task, self._stdout = None, None
-        self._process: asyncio.subprocess.Process | None = None
+        self._decoder, self._inotify = decoder, inotify
+        self._lines, self._partial, self._stopping = collections.deque(), b'', False
+        self._file, self._inode, self._watcher, self._publisher = None, None, None, None
 
     async def start(self) -> bool:
         try:
-            self._process = await asyncio.create_subprocess_exec(
-                'tail', '-f', self._path,
-                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
-            self._stdout = PipeOutLineProducer(self._mailer, self._source, self._name, self._process.stdout)
-            self._task = tasks.task_start(self._run(), 'TailPublisher(' + self._path + ')')
+            await asyncio.to_thread(self._open, TailPublisher.TAIL_LINES)
+            self._watcher = _create_watcher(self._path) if self._inotify else _Watcher(TailPublisher.POLL_INTERVAL)
+            self._publisher = msgext.Publisher(self._mailer, self)
             return True
         except Exception as e:
-            logging.warning('Error starting tail -f %s %s', self._path, repr(e))
+            logging.warning('Error starting tail %s %s', self._path, repr(e))
+            self._close()
         return False
 
-    async def _run(self):
+    def stop(self):
+        self._stopping = True
+        if self._watcher:
+            self._watcher.wake()
+
+    async def next_message(self):
         try:
-            rc = await self._process.wait()
-            logging.debug('tail -f %s exit code: %s', self._path, rc)
+            while not self._lines and not self._stopping:
+                chunk = await asyncio.to_thread(self._read)
+                if chunk:
+                    self._partial = _split_lines(self._lines, self._partial + chunk)
+                else:
+                    await self._watcher.wait()
+            if not self._stopping:
+                return msgabc.Message(self._source, self._name, self._decoder.decode(self._lines.popleft()))
         except Exception as e:
-            logging.warning('Error waiting tail -f %s %s', self._path, repr(e))
-        finally:
-            await funcutil.silently_cleanup(self._stdout)
-            tasks.task_end(self._task)
+            logging.warning('Error reading tail %s %s', self._path, repr(e))
+        self._close()
+        return None
 
-    def stop(self):
-        if not self._process or self._process.returncode is not None:
-            return
+    def _open(self, tail_lines: int = 0):
+        file = open(self._path, mode='rb')  # pylint: disable=consider-using-with
+        if tail_lines:
+            file.seek(_tail_offset(file, tail_lines))
+        if self._file:
+            self._file.close()
+        self._file, self._inode = file, os.fstat(file.fileno()).st_ino
+
+    def _read(self) -> bytes:
+        chunk = self._file.read(PipeOutLineProducer.CHUNK_SIZE)
+        if chunk:
+            return chunk
         try:
-            self._process.terminate()
-        except Exception as e:
-            logging.warning('Error killing tail -f %s %s', self._path, repr(e))
+            stats = os.stat(self._path)
+        except FileNotFoundError:
+            return b''  # Removed, wait for it to be recreated
+        if stats.st_ino != self._inode:
+            if self._partial:
+                self._lines.append(self._partial)
+                self._partial = b''
+            self._open()
+            return self._file.read(PipeOutLineProducer.CHUNK_SIZE)
+        if stats.st_size < self._file.tell():
+            self._file.seek(0)
+            return self._file.read(PipeOutLineProducer.CHUNK_SIZE)
+        return b''
+
+    def _close(self):
+        file, watcher, self._file, self._watcher = self._file, self._watcher, None, None
+        if watcher:
+            watcher.close()
+        if file:
+            file.close()
+
+
+def _tail_offset(file: typing.BinaryIO, count: int) -> int:
+    end = file.seek(0, os.SEEK_END)
+    start = max(0, end - PipeOutLineProducer.CHUNK_SIZE)
+    file.seek(start)
+    data = file.read(end - start)
+    index = len(data) - 1 if data.endswith(b'\n') else len(data)
+    for _ in range(count):
+        index = data.rfind(b'\n', 0, index)
+        if index < 0:
+            return start
+    return start + index + 1
+
+
+class _Watcher:
+
+    def __init__(self, interval: float):
+        self._interval, self._event = interval, asyncio.Event()
+
+    def wake(self):
+        self._event.set()
+
+    async def wait(self):
+        try:
+            await asyncio.wait_for(self._event.wait(), self._interval)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+    def close(self):
+        pass
+
+
+class _InotifyWatcher(_Watcher):
+    IN_MODIFY, IN_ATTRIB, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x2, 0x4, 0x40, 0x80, 0x100, 0x200
+    EVENT = struct.Struct('iIII')
+    _LIBC = None
+
+    def __init__(self, path: str):
+        super().__init__(TailPublisher.WATCH_INTERVAL)
+        if _InotifyWatcher._LIBC is None:
+            _InotifyWatcher._LIBC = ctypes.CDLL(None, use_errno=True)
+        libc, directory = _InotifyWatcher._LIBC, os.path.dirname(os.path.abspath(path))
+        self._name, self._fd = os.path.basename(path).encode(), libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = _InotifyWatcher.IN_MODIFY | _InotifyWatcher.IN_ATTRIB | _InotifyWatcher.IN_MOVED_FROM \
+            | _InotifyWatcher.IN_MOVED_TO | _InotifyWatcher.IN_CREATE | _InotifyWatcher.IN_DELETE
+        if libc.inotify_add_watch(self._fd, directory.encode(), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, 'inotify_add_watch failed')
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._fd, self._readable)
+
+    def _readable(self):
+        try:
+            while True:
+                data, offset = os.read(self._fd, 65536), 0
+                while offset < len(data):
+                    _, _, _, length = _InotifyWatcher.EVENT.unpack_from(data, offset)
+                    offset += _InotifyWatcher.EVENT.size
+                    if data[offset:offset + length].rstrip(b'\0') == self._name:
+                        self._event.set()
+                    offset += length
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+
+
+def _create_watcher(path: str) -> _Watcher:
+    try:
+        return _InotifyWatcher(path)
+    except Exception as e:
+        logging.debug('inotify unavailable for %s, polling instead: %s', path, repr(e))
+    return _Watcher(TailPublisher.POLL_INTERVAL)
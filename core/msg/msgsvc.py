@@ -1,4 +1,8 @@
+from __future__ import annotations
 import logging
+import time
+import bisect
+import collections
 import asyncio
 import typing
 # ALLOW util.* msg.msgabc msg.msgftr msg.msgtrf
@@ -8,8 +12,18 @@ from core.msg import msgabc, msgftr
 
 class TaskMailer(msgabc.Mailer):
 
-    def __init__(self, subscriber: msgabc.Subscriber):
-        self._subscriber, self._queue = subscriber, asyncio.Queue()
+    def __init__(self, subscriber: msgabc.Subscriber,
+                 maxsize: int = 0, policy: msgabc.OverflowPolicy = msgabc.OverflowPolicy.BLOCK,
+                 stats: typing.Optional[MailerStats] = None, priority: typing.Optional[msgabc.Filter] = None):
+        if isinstance(subscriber, msgabc.Bounded):
+            maxsize, policy = subscriber.queue_limits()
+        self._subscriber, self._stats = subscriber, stats
+        self._queue = _MailerQueue(_compiled_priority(subscriber, priority), stats.wait() if stats else None)
+        self._urgent = priority is not None and subscriber.names() is not None
+        self._accepts = _compiled_accepts(subscriber)
+        self._maxsize, self._policy, self._overflows = maxsize, policy, 0
+        self._writable = asyncio.Event()
+        self._writable.set()
         self._running, self._task = False, None
 
     def start(self) -> asyncio.Task:
@@ -17,6 +31,24 @@ class TaskMailer(msgabc.Mailer):
         self._running = True
         return self._task
 
+    def subscriber(self) -> msgabc.Subscriber:
+        return self._subscriber
+
+    def names(self) -> typing.Optional[typing.AbstractSet[str]]:
+        return self._subscriber.names()
+
+    def expired(self) -> bool:
+        return not self._running or self._subscriber.expired()
+
+    def urgent(self) -> bool:
+        return self._urgent  # Named subscriber, so priority messages may be posted ahead of the dispatcher backlog
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def backlog(self) -> int:
+        return self._queue.qsize() if self._running else 0
+
     def post(self, *vargs) -> bool:
         if not self._running:
             return False
@@ -25,12 +57,39 @@ class TaskMailer(msgabc.Mailer):
             if message is msgabc.STOP:
                 self._running = False
                 self._queue.put_nowait(message)
-            elif self._subscriber.accepts(message):
-                self._queue.put_nowait(message)
+                self._writable.set()
+            elif self._accepts(message):
+                if self._maxsize and self._queue.qsize() >= self._maxsize:
+                    self._overflow(message)
+                else:
+                    self._queue.put_nowait(message)
         except Exception as e:
             logging.warning('Posting exception. raised: %s', repr(e))
         return self._running
 
+    def overflows(self) -> int:
+        return self._overflows
+
+    def blocked(self) -> bool:
+        return not self._writable.is_set()
+
+    async def drain(self):
+        while self._running and not self._writable.is_set():
+            await self._writable.wait()
+
+    def _overflow(self, message: msgabc.Message):
+        self._overflows += 1
+        policy = self._policy
+        if policy is msgabc.OverflowPolicy.DROP_NEWEST:
+            return
+        if policy is msgabc.OverflowPolicy.COALESCE and self._queue.coalesce(message):
+            return
+        if policy is msgabc.OverflowPolicy.BLOCK:
+            self._writable.clear()  # Queue anyway, awaiting producers hold off until drained
+        else:
+            self._queue.drop_oldest()
+        self._queue.put_nowait(message)
+
     async def join_queue(self) -> int:
         if not self._running:
             return 0
@@ -46,38 +105,257 @@ class TaskMailer(msgabc.Mailer):
         await self._task
 
     async def _run(self) -> typing.Any:
+        batching = isinstance(self._subscriber, msgabc.BatchHandler)
         result, running = None, True
         while running:
             result = None
-            message = await self._queue.get()
-            if (message is not msgabc.STOP) or (message is msgabc.STOP and self._subscriber.accepts(msgabc.STOP)):
-                result = await msgabc.try_handle(self._subscriber, message)
-            if result is not None or message is msgabc.STOP:
+            messages = await self._next_batch() if batching else [await self._queue.get()]
+            if not self._writable.is_set() and self._queue.qsize() < self._maxsize:
+                self._writable.set()
+            stopping = messages[-1] is msgabc.STOP
+            batch = messages[:-1] if stopping else messages
+            if batch:
+                result = await self._handle(batching, batch)
+            if result is None and stopping and self._subscriber.accepts(msgabc.STOP):
+                result = await msgabc.try_handle(self._subscriber, msgabc.STOP)
+            if result is not None or stopping:
                 self._running, running = False, False
                 if result is None:
                     result = True
-            self._queue.task_done()
+            for _ in messages:
+                self._queue.task_done()
+            if self._queue.took_priority():
+                await asyncio.sleep(0)  # Let downstream mailers see priority messages before the backlog
+        self._writable.set()
         tasks.task_end(self._task)
         return result
 
+    async def _handle(self, batching: bool, batch: typing.List[msgabc.Message]) -> typing.Any:
+        stats, start = self._stats, 0.0
+        if stats:
+            start = time.perf_counter()
+        if batching:
+            result = await msgabc.try_handle_batch(self._subscriber, batch)
+        else:
+            result = await msgabc.try_handle(self._subscriber, batch[0])
+        if stats:
+            stats.handled(time.perf_counter() - start)
+        return result
+
+    async def _next_batch(self) -> typing.List[msgabc.Message]:
+        batch_size, batch_window = self._subscriber.batch_size(), self._subscriber.batch_window()
+        message = await self._queue.get()
+        messages, deadline = [message], time.monotonic() + batch_window
+        while message is not msgabc.STOP and len(messages) < batch_size:
+            try:
+                message = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0.0:
+                    break
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            messages.append(message)
+        return messages
+
+
+class Histogram:
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+    def __init__(self):
+        self._counts, self._sum = [0] * len(Histogram.BUCKETS), 0.0
+
+    def observe(self, value: float):
+        self._sum += value
+        self._counts[bisect.bisect_left(Histogram.BUCKETS, value)] += 1
+
+    def buckets(self) -> typing.List[typing.Tuple[float, int]]:
+        result, total = [], 0
+        for bound, count in zip(Histogram.BUCKETS, self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def sum(self) -> float:
+        return self._sum
+
+
+class MailerStats:
+
+    def __init__(self):
+        self._wait, self._handle = Histogram(), Histogram()
+
+    def wait(self) -> Histogram:
+        return self._wait
+
+    def handle(self) -> Histogram:
+        return self._handle
+
+    def handled(self, duration: float):
+        self._handle.observe(duration)
+
+
+class _MailerQueue(asyncio.Queue):
+
+    def __init__(self, priority: typing.Optional[typing.Callable[[msgabc.Message], bool]] = None,
+                 wait: typing.Optional[Histogram] = None):
+        self._priority, self._wait, self._took_priority = priority, wait, False
+        super().__init__()
+
+    def _init(self, maxsize):  # Lanes replace the asyncio.Queue deque, all access goes through _put and _get
+        self._bulk, self._urgent = collections.deque(), collections.deque()
+        self._bulk_stamps, self._urgent_stamps = collections.deque(), collections.deque()  # Only kept with stats
+
+    def qsize(self):
+        return len(self._bulk) + len(self._urgent)
+
+    def empty(self):
+        return not self._bulk and not self._urgent
+
+    def _put(self, item):
+        if self._priority and item is not msgabc.STOP and self._priority(item):
+            lane, stamps = self._urgent, self._urgent_stamps
+        else:
+            lane, stamps = self._bulk, self._bulk_stamps
+        lane.append(item)
+        if self._wait:
+            stamps.append(time.monotonic())
+
+    def _get(self):
+        if self._urgent:
+            self._took_priority = True
+            lane, stamps = self._urgent, self._urgent_stamps
+        else:
+            lane, stamps = self._bulk, self._bulk_stamps
+        item = lane.popleft()
+        if self._wait:
+            waited = time.monotonic() - stamps.popleft()
+            if item is not msgabc.STOP:
+                self._wait.observe(waited)
+        return item
+
+    def took_priority(self) -> bool:
+        result, self._took_priority = self._took_priority, False
+        return result
+
+    def drop_oldest(self):
+        for lane, stamps in ((self._bulk, self._bulk_stamps), (self._urgent, self._urgent_stamps)):
+            for index, queued in enumerate(lane):
+                if queued is not msgabc.STOP:
+                    del lane[index]
+                    if self._wait:
+                        del stamps[index]
+                    self.task_done()
+                    return
+
+    def coalesce(self, message: msgabc.Message) -> bool:
+        if self._priority and self._priority(message):
+            return False
+        lane, name = self._bulk, message.name()
+        for index, queued in enumerate(lane):
+            if queued is not msgabc.STOP and queued.name() == name:
+                del lane[index]
+                lane.append(message)
+                if self._wait:
+                    del self._bulk_stamps[index]
+                    self._bulk_stamps.append(time.monotonic())
+                return True
+        return False
+
+
+def _compiled_priority(
+        subscriber: msgabc.Subscriber,
+        priority: typing.Optional[msgabc.Filter]) -> typing.Optional[typing.Callable[[msgabc.Message], bool]]:
+    if priority is None:
+        return None
+    names, priority_names = subscriber.names(), priority.names()
+    if names is None:
+        return None  # Accepts any message, e.g. a dispatcher, so a lane could reorder messages between subscribers
+    if priority_names is None:
+        return msgftr.compile_filter(priority)
+    if names.isdisjoint(priority_names) or names <= priority_names:
+        return None  # Subscriber only gets bulk or only gets priority messages, so order is unchanged by lanes
+    return msgftr.compile_filter(priority)
+
+
+def _compiled_accepts(subscriber: msgabc.Subscriber) -> typing.Callable[[msgabc.Message], bool]:
+    if isinstance(subscriber, msgabc.AbcSubscriber) and type(subscriber).accepts is msgabc.AbcSubscriber.accepts:
+        return msgftr.compile_filter(subscriber.msg_filter())
+    return subscriber.accepts
+
 
 class TaskMulticastMailer(msgabc.MulticastMailer):
 
-    def __init__(self, msg_filter: msgabc.Filter = msgftr.AcceptAll()):
-        self._subscriber = _MulticastSubscriber(msg_filter)
-        self._mailer = TaskMailer(self._subscriber)
+    def __init__(self, msg_filter: msgabc.Filter = msgftr.AcceptAll(), indexed: bool = False,
+                 maxsize: int = 0, policy: msgabc.OverflowPolicy = msgabc.OverflowPolicy.BLOCK,
+                 sweep_interval: float = 0.0, priority: typing.Optional[msgabc.Filter] = None):
+        urgent = msgftr.compile_filter(priority) if priority else None
+        subscriber_class = _IndexedMulticastSubscriber if indexed else _MulticastSubscriber
+        self._subscriber = subscriber_class(msg_filter, urgent)
+        self._mailer, self._urgent = TaskMailer(self._subscriber), urgent
+        self._maxsize, self._policy, self._priority = maxsize, policy, priority
+        self._sweep_interval, self._sweeper = sweep_interval, None
+        self._stats: typing.Optional[typing.Dict[str, MailerStats]] = None
 
     def start(self) -> asyncio.Task:
+        if self._sweep_interval > 0.0:
+            self._sweeper = tasks.task_start(self._sweep(), 'TaskMulticastMailer.Sweeper')
         return self._mailer.start()
 
+    def lifecycle(self) -> typing.Tuple[int, int, int]:
+        return self._subscriber.lifecycle()
+
+    def backlog(self) -> int:
+        return self._mailer.backlog() + max((m.backlog() for m in self._subscriber.mailers()), default=0)
+
+    def sweep(self) -> int:
+        return self._subscriber.sweep()
+
+    async def _sweep(self):
+        try:
+            while True:
+                await asyncio.sleep(self._sweep_interval)
+                self._subscriber.sweep()
+        except asyncio.CancelledError:
+            pass
+        tasks.task_end(self._sweeper)
+
+    def instrument(self):
+        if self._stats is None:
+            self._stats = {}
+
+    def stats(self) -> typing.Dict[str, typing.Tuple[int, MailerStats]]:
+        if self._stats is None:
+            return {}
+        depths = dict.fromkeys(self._stats.keys(), 0)
+        for mailer in self._subscriber.mailers():
+            key = _stats_key(mailer.subscriber())
+            if key in depths:
+                depths[key] += mailer.qsize()
+        return {key: (depths[key], stats) for key, stats in self._stats.items()}
+
     def register(self, subscriber: msgabc.Subscriber) -> msgabc.Mailer:
-        mailer = TaskMailer(subscriber)
+        stats = None
+        if self._stats is not None:
+            stats = self._stats.setdefault(_stats_key(subscriber), MailerStats())
+        mailer = TaskMailer(subscriber, self._maxsize, self._policy, stats, self._priority)
         mailer.start()
         self._subscriber.add(mailer)
         return mailer
 
     def post(self, *vargs) -> bool:
-        return self._mailer.post(*vargs)
+        if self._urgent is None:
+            return self._mailer.post(*vargs)
+        message = msgabc.Message.from_vargs(*vargs)
+        if message is not msgabc.STOP and not self._mailer.expired() and self._urgent(message) \
+                and self._subscriber.accepts(message):
+            self._subscriber.deliver_urgent(message)
+        return self._mailer.post(message)
+
+    def correlate(self, request: msgabc.Message) -> asyncio.Future:
+        return self._subscriber.replies().expect(request)
 
     async def _join_queue(self) -> int:
         qsize = await self._mailer.join_queue()
@@ -86,6 +364,10 @@ class TaskMulticastMailer(msgabc.MulticastMailer):
         return qsize
 
     async def stop(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            await self._sweeper
+            self._sweeper = None
         while await self._join_queue() > 0:
             logging.debug('TaskMulticastMailer required additional queue join')
         for mailer in self._subscriber.mailers():
@@ -94,23 +376,158 @@ class TaskMulticastMailer(msgabc.MulticastMailer):
         await self._mailer.stop()
 
 
+def _stats_key(subscriber: msgabc.Subscriber) -> str:
+    clazz = type(subscriber)
+    return clazz.__module__ + '.' + clazz.__qualname__
+
+
 class _MulticastSubscriber(msgabc.AbcSubscriber):
 
-    def __init__(self, msg_filter: msgabc.Filter):
+    def __init__(self, msg_filter: msgabc.Filter,
+                 urgent: typing.Optional[typing.Callable[[msgabc.Message], bool]] = None):
         super().__init__(msgftr.Or(msg_filter, msgftr.IsStop()))
-        self._mailers = []
+        self._mailers, self._replies, self._urgent, self._urgent_posted = [], _ReplyTable(), urgent, False
+        self._registered, self._removed = 0, 0
+
+    def replies(self) -> _ReplyTable:
+        return self._replies
 
     def mailers(self) -> tuple:
         return tuple(self._mailers)
 
-    def add(self, mailer: msgabc.Mailer):
+    def lifecycle(self) -> typing.Tuple[int, int, int]:
+        return len(self._mailers), self._registered, self._removed
+
+    def add(self, mailer: TaskMailer):
         self._mailers.append(mailer)
+        self._registered += 1
+
+    def remove(self, mailer: TaskMailer):
+        self._mailers.remove(mailer)
+        self._removed += 1
+
+    def sweep(self) -> int:
+        expired = [mailer for mailer in self._mailers if mailer.expired()]
+        for mailer in expired:
+            mailer.post(msgabc.STOP)
+            self.remove(mailer)
+        return len(expired)
+
+    def deliver_urgent(self, message: msgabc.Message):
+        self._post_urgent(self._mailers, message)
+
+    def _post_urgent(self, mailers: typing.Iterable[TaskMailer], message: msgabc.Message):
+        for mailer in mailers:
+            if mailer.urgent():
+                mailer.post(message)
+                self._urgent_posted = True
 
-    def handle(self, message):
-        expired = []
-        for mailer in self._mailers:
-            if not mailer.post(message):
-                expired.append(mailer)
+    def _skip_urgent(self, message: msgabc.Message) -> bool:
+        return message is not msgabc.STOP and self._urgent is not None and self._urgent(message)
+
+    async def _yield_to_urgent(self):
+        if self._urgent_posted:
+            self._urgent_posted = False
+            await asyncio.sleep(0)  # Let subscribers handle urgent messages before the dispatcher backlog
+
+    async def handle(self, message):
+        await self._yield_to_urgent()
+        if self._replies:
+            self._replies.resolve(message)
+        expired, blocked = [], []
+        _deliver(self._mailers, message, expired, blocked, self._skip_urgent(message))
+        await self._settle(expired, blocked)
+        return None
+
+    async def _settle(self, expired: typing.List[TaskMailer], blocked: typing.List[TaskMailer]):
         for mailer in expired:
-            self._mailers.remove(mailer)
+            self.remove(mailer)
+        for mailer in blocked:
+            await mailer.drain()
+
+
+class _IndexedMulticastSubscriber(_MulticastSubscriber):
+
+    def __init__(self, msg_filter: msgabc.Filter,
+                 urgent: typing.Optional[typing.Callable[[msgabc.Message], bool]] = None):
+        super().__init__(msg_filter, urgent)
+        self._index: typing.Dict[str, typing.List[TaskMailer]] = {}
+        self._fallback: typing.List[TaskMailer] = []
+        self._names: typing.Dict[TaskMailer, typing.AbstractSet[str]] = {}
+
+    def add(self, mailer):
+        super().add(mailer)
+        names = mailer.names()
+        if names is None:
+            self._fallback.append(mailer)
+            return
+        self._names[mailer] = names
+        for name in names:
+            if name in self._index:
+                self._index[name].append(mailer)
+            else:
+                self._index[name] = [mailer]
+
+    def remove(self, mailer):
+        super().remove(mailer)
+        names = self._names.pop(mailer, None)
+        if names is None:
+            self._fallback.remove(mailer)
+            return
+        for name in names:
+            mailers = self._index[name]
+            mailers.remove(mailer)
+            if not mailers:
+                del self._index[name]
+
+    def deliver_urgent(self, message):
+        self._post_urgent(self._index.get(message.name(), ()), message)
+
+    async def handle(self, message):
+        if message is msgabc.STOP:
+            return await super().handle(message)
+        await self._yield_to_urgent()
+        if self._replies:
+            self._replies.resolve(message)
+        expired, blocked, candidates = [], [], self._index.get(message.name())
+        skip_urgent = self._skip_urgent(message)
+        if candidates:
+            _deliver(candidates, message, expired, blocked, skip_urgent)
+        _deliver(self._fallback, message, expired, blocked, skip_urgent)
+        await self._settle(expired, blocked)
         return None
+
+
+class _ReplyTable:
+
+    def __init__(self):
+        self._pending: typing.Dict[msgabc.Message, asyncio.Future] = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def expect(self, request: msgabc.Message) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request] = future
+        future.add_done_callback(lambda f: self._discard(request, f))
+        return future
+
+    def resolve(self, message: msgabc.Message):
+        future = self._pending.get(message.reply_to())
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _discard(self, request: msgabc.Message, future: asyncio.Future):
+        if self._pending.get(request) is future:
+            del self._pending[request]
+
+
+def _deliver(mailers: typing.Iterable[TaskMailer], message: msgabc.Message,
+             expired: typing.List[TaskMailer], blocked: typing.List[TaskMailer], skip_urgent: bool = False):
+    for mailer in mailers:
+        if skip_urgent and mailer.urgent():
+            continue  # Already posted ahead of the backlog by deliver_urgent()
+        if not mailer.post(message):
+            expired.append(mailer)
+        elif mailer.blocked():
+            blocked.append(mailer)
@@ -24,7 +24,7 @@ class DataAsDict(msgabc.Transformer):
 class ToLogLine(msgabc.Transformer):
 
     def transform(self, message):
-        return 'msg> ' + ToLogLine._transform(message, 40)
+        return message.derive(_log_line)
 
     @staticmethod
     def _transform(message, pad):
@@ -35,3 +35,7 @@ class ToLogLine(msgabc.Transformer):
         if reply_to:
             line.append('[' + ToLogLine._transform(reply_to, 10) + ']')
         return ' '.join(line)
+
+
+def _log_line(message: msgabc.Message) -> str:
+    return 'msg> ' + ToLogLine._transform(message, 40)
@@ -54,3 +54,9 @@ class ServerProcess:
 
 class WebResource:
     READY = 'WebResource.Ready'
+
+
+class Priority:
+    # Control messages that may overtake queued log lines, cleanup messages excluded so pending lines are not lost,
+    # status requests excluded so they cannot overtake queued status notifications
+    FILTER = msgftr.NameIn(ServerService.START, ServerService.RESTART, ServerService.STOP)
@@ -79,9 +79,11 @@ class JobProcess(msgabc.AbcSubscriber):
                     command.command()[0], *command.command()[1:],
                     stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
             stderr = msgpipe.PipeOutLineProducer(
-                self._mailer, command.source(), JobProcess.STDERR_LINE, process.stderr, command.decoder())
+                self._mailer, command.source(), JobProcess.STDERR_LINE, process.stderr, command.decoder(),
+                msgpipe.PipeOutLineProducer.CHUNK_SIZE)
             stdout = msgpipe.PipeOutLineProducer(
-                self._mailer, command.source(), JobProcess.STDOUT_LINE, process.stdout, command.decoder())
+                self._mailer, command.source(), JobProcess.STDOUT_LINE, process.stdout, command.decoder(),
+                msgpipe.PipeOutLineProducer.CHUNK_SIZE)
             stdin = JobPipeInLineService(self._mailer, process.stdin)
             replied = self._mailer.post(command.source(), JobProcess.STATE_STARTED, process, message)
             rc = await process.wait()
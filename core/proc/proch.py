@@ -74,6 +74,9 @@ class PipeInLineService(msgabc.Subscriber):
     def accepts(self, message):
         return self._msg_filter.accepts(message)
 
+    def names(self):
+        return self._msg_filter.names()
+
     async def handle(self, message):
         if mc.ServerProcess.FILTER_STATE_STARTED.accepts(message):
             self._enabled = True
@@ -105,6 +108,7 @@ class ServerProcess:
         self._out_decoder = linenc.DefaultLineDecoder()
         self._pipeinsvc, self._started_catcher = None, None
         self._process, self._env, self._cwd = None, None, None
+        self._high_water, self._low_water, self._line_limits = 0, 0, None
 
     def append_arg(self, arg: str | int | float) -> ServerProcess:
         self._command.append(arg)
@@ -122,6 +126,15 @@ class ServerProcess:
         self._out_decoder = line_decoder
         return self
 
+    def use_backpressure(self, high_water: int = 10000, low_water: int = 2000) -> ServerProcess:
+        self._high_water, self._low_water = high_water, low_water
+        return self
+
+    def use_line_limiter(self, collapse: bool = True,
+                         limits: typing.Iterable[typing.Tuple[str, float]] = ()) -> ServerProcess:
+        self._line_limits = collapse, tuple(limits)
+        return self
+
     def use_env(self, env: dict[str, str]) -> ServerProcess:
         self._env = env
         return self
@@ -149,9 +162,11 @@ class ServerProcess:
             if rc is not None:  # I don't think this can happen but to be sure
                 raise Exception(f'PID {pid} exit after START, rc={rc}')
             stderr = msgpipe.PipeOutLineProducer(
-                self._mailer, self, mc.ServerProcess.STDERR_LINE, self._process.stderr, self._out_decoder)
+                self._line_mailer(), self, mc.ServerProcess.STDERR_LINE, self._process.stderr, self._out_decoder,
+                msgpipe.PipeOutLineProducer.CHUNK_SIZE, self._high_water, self._low_water)
             stdout = msgpipe.PipeOutLineProducer(
-                self._mailer, self, mc.ServerProcess.STDOUT_LINE, self._process.stdout, self._out_decoder)
+                self._line_mailer(), self, mc.ServerProcess.STDOUT_LINE, self._process.stdout, self._out_decoder,
+                msgpipe.PipeOutLineProducer.CHUNK_SIZE, self._high_water, self._low_water)
             self._mailer.post(self, PipeInLineService.PIPE_NEW, self._process.stdin)
             if not self._pipeinsvc:
                 PipeInLineService(self._mailer, self._process.stdin)
@@ -173,6 +188,12 @@ class ServerProcess:
             # PipeInLineService closes itself via PROCESS_ENDED message
             self._process = None
 
+    def _line_mailer(self) -> msgabc.Mailer:
+        if self._line_limits is None:
+            return self._mailer
+        collapse, limits = self._line_limits
+        return msgpipe.LineLimiter(self._mailer, collapse, limits)
+
     async def _wait_for_started(self):
         try:
             if self._process.returncode is not None:  # One last check before wait
@@ -50,6 +50,7 @@ def _argument_parser() -> argparse.ArgumentParser:
     p.add_argument('--showtoken', action='store_true', help='Print the login token to stdout')
     p.add_argument('--noupnp', action='store_true', help='Do not enable UPnP services')
     p.add_argument('--nostore', action='store_true', help='Do not use database to store activity')
+    p.add_argument('--mailerstats', action='store_true', help='Record message queue and handler metrics')
     p.add_argument('--debug', action='store_true', help='Debug mode logging')
     p.add_argument('--trace', action='store_true', help='Debug mode with more logging')
     return p
@@ -81,12 +82,14 @@ def _create_context() -> contextsvc.Context | None:
     noupnp = True if args.noupnp else objconv.to_bool(util.get('noupnp', cfg))
     nostore = True if args.nostore else objconv.to_bool(util.get('nostore', cfg))
     dbfile = None if nostore else util.full_path(home, 'serverjockey.db')
+    mailerstats = True if args.mailerstats else objconv.to_bool(util.get('mailerstats', cfg))
     debug = True if args.debug else objconv.to_bool(util.get('debug', cfg))
     trace = True if args.trace else objconv.to_bool(util.get('trace', cfg))
     secret = util.get('secret', cfg, idutil.generate_token(10, True))
     return contextsvc.Context(dict(
         home=home, logfile=logfile, tempdir=tempdir, host=host, port=port, modules=modules, single=single,
-        showtoken=showtoken, noupnp=noupnp, dbfile=dbfile, debug=debug, trace=trace, secret=secret,
+        showtoken=showtoken, noupnp=noupnp, dbfile=dbfile, mailerstats=mailerstats,
+        debug=debug, trace=trace, secret=secret,
         stime=stime, scheme=httpssl.sync_get_scheme(home), env=os.environ.copy()))
 
 
@@ -8,7 +8,7 @@ from core.msgc import mc
 from core.context import contextsvc, contextext
 from core.http import httpabc, httpsec, httprsc, httpext, httpsubs, httpssl
 from core.remotes import steamapi, igd
-from core.metrics import mtxhandler, mprof
+from core.metrics import mtxutil, mtxhandler, mtxmailer, mprof
 from core.store import sysstore
 from core.system import svrmodules, svrsvc
 
@@ -52,6 +52,7 @@ class SystemService:
         return resource
 
     async def initialise(self):
+        await mtxmailer.create_mailer_collector(mtxutil.REGISTRY, mtxutil.PROC_LABEL_VALUE_SELF, self._context)
         self._context.register(self._pidfile)
         igd.initialise(self._context, self)
         self._sysstoresvc.initialise()
@@ -1,3 +1,4 @@
+import os
 import shutil
 import lzma
 import tarfile
@@ -5,6 +6,8 @@ import gzip
 # ALLOW util.*
 from core.util import funcutil
 
+COMPRESSIONS = {'gz': gzip.open, 'xz': lzma.open}
+
 
 def _sync_unpack_tarxz(file_path: str, target_directory: str):
     with lzma.open(file_path) as fd:
@@ -22,12 +25,23 @@ def _sync_unpack_targz(file_path: str, target_directory: str):
         tar.extractall(target_directory)
 
 
+def _sync_compress_file(file_path: str, extension: str = 'gz') -> str:
+    target = file_path + '.' + extension
+    with open(file_path, 'rb') as source:
+        with COMPRESSIONS[extension](target + '.part', 'wb') as fd:
+            shutil.copyfileobj(source, fd)
+    os.replace(target + '.part', target)
+    os.remove(file_path)
+    return target
+
+
 unpack_tarxz = funcutil.to_async(_sync_unpack_tarxz)
 unpack_tarbz = funcutil.to_async(_sync_unpack_tarbz)
 unpack_targz = funcutil.to_async(_sync_unpack_targz)
 unpack_archive = funcutil.to_async(shutil.unpack_archive)
 gzip_compress = funcutil.to_async(gzip.compress)
 gzip_decompress = funcutil.to_async(gzip.decompress)
+compress_file = funcutil.to_async(_sync_compress_file)
 
 
 def make_archive_script(archive_file: str, unpacked_dir: str) -> str:
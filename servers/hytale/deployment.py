@@ -148,7 +148,7 @@ class Deployment:
         self._set_event_expressions(cmdargs)
         uck.set_check_update_minutes(self._context, self, util.get('check_update_minutes', cmdargs))
         server = proch.ServerProcess(self._context, self._java_exe)
-        server.use_cwd(self._world_dir).use_out_decoder(linenc.PtyLineDecoder())
+        server.use_cwd(self._world_dir).use_out_decoder(linenc.PtyLineDecoder()).use_line_limiter()
         server.append_arg('-XX:AOTCache=' + self._server_dir + '/Server/HytaleServer.aot')
         server.append_struct(jreargs)
         server.append_arg('-jar').append_arg(self._server_jar)
@@ -100,7 +100,7 @@ class Deployment:
         cmdargs = objconv.json_to_dict(await io.read_file(self._cmdargs_file))
         self._map_ports(cmdargs)
         server = proch.ServerProcess(self._context, executable)
-        server.use_cwd(self._runtime_dir).use_env(self._env)
+        server.use_cwd(self._runtime_dir).use_env(self._env).use_line_limiter()
         server.append_arg('-nographics').append_arg('-batchmode')
         server.append_arg('-savedir').append_arg(self._world_dir)
         server.append_struct(util.delete_dict(cmdargs, (
@@ -0,0 +1,21 @@
+import os
+import sys
+import unittest
+from test.bench import results
+
+
+def main() -> int:
+    # Usage: python3 -m test.bench [results.json] [pattern]
+    if len(sys.argv) > 1:
+        os.environ['BENCH_RESULTS'] = sys.argv[1]
+    pattern = sys.argv[2] if len(sys.argv) > 2 else '*.py'
+    suite = unittest.defaultTestLoader.discover('test/bench', pattern, '.')
+    result = unittest.TextTestRunner(verbosity=1).run(suite)
+    path = results.write()
+    if path:
+        print('Results written to ' + path)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import time
+import typing
+import unittest
+from test.bench import results
+from core.util import util
+from core.http import httpabc, httprsc
+
+_LOOKUPS = 20000
+
+
+class _Handler(httpabc.GetHandler):
+
+    def handle_get(self, resource, data):
+        return None
+
+
+def _linear_lookup(root: httpabc.Resource, path: str) -> typing.Optional[httpabc.Resource]:
+    # Previous PathProcessor.lookup_resource, scanning children at each segment
+    found, current = False, root
+    for element in path.split('/')[1:]:
+        found_path, found_arg = False, False
+        for path_resource in current.children(httpabc.ResourceKind.PATH):
+            if not found_path and element == path_resource.name():
+                found, found_path, current = True, True, path_resource
+        if not found_path:
+            arg_resource = util.single(current.children(*httprsc.ARG_KINDS))
+            if arg_resource is not None:
+                found, found_arg, current = True, True, arg_resource
+                if arg_resource.kind() is httpabc.ResourceKind.ARG_TAIL:
+                    return arg_resource
+        if not (found_path or found_arg):
+            return None
+    return current if found else None
+
+
+def _build(instances: int) -> httprsc.WebResource:
+    root, handler = httprsc.WebResource(), _Handler()
+    builder = httprsc.ResourceBuilder(root)
+    for name in ('login', 'modules', 'ssl', 'metrics', 'mprof', 'system', 'subscriptions'):
+        builder.put(name, handler)
+    builder.psh('instances', handler)
+    for i in range(instances):
+        builder.psh('instance' + str(i), handler)
+        builder.psh('server', handler).put('subscribe', handler).put('{command}', handler).pop()
+        builder.psh('console', handler).put('subscribe', handler).put('tail', handler).pop()
+        builder.psh('deployment', handler)
+        for name in ('runtime-meta', 'wipe-runtime', 'wipe-world', 'backup-runtime', 'backup-world'):
+            builder.put(name, handler)
+        builder.psh('logs', handler).put('*{path}', handler).pop()
+        builder.psh('backups', handler).put('*{path}', handler).pop()
+        builder.pop()
+        builder.psh('players', handler).put('{player}', handler).pop()
+        builder.pop()
+    return root
+
+
+class BenchCoreHttpRsc(unittest.TestCase):
+
+    def test_lookup(self):
+        for instances in (1, 50, 500):
+            root = _build(instances)
+            paths = ('/instances/instance' + str(instances - 1) + '/deployment/logs/20250101-120000.log',
+                     '/instances/instance' + str(instances // 2) + '/players/Apollo',
+                     '/instances/instance0/console/tail')
+            for name, lookup in (('linear', _linear_lookup), ('indexed', httprsc.WebResource.lookup)):
+                start = time.perf_counter()
+                for _ in range(_LOOKUPS):
+                    for path in paths:
+                        assert lookup(root, path) is not None
+                per_lookup = (time.perf_counter() - start) / (_LOOKUPS * len(paths))
+                print(f'\nlookup {name} instances={instances} per_lookup={per_lookup * 1000000.0:.2f}us')
+                results.record('httprsc.lookup', dict(lookup=name, instances=instances),
+                               per_lookup_us=per_lookup * 1000000.0)
@@ -0,0 +1,128 @@
+import time
+import typing
+import inspect
+import importlib
+import unittest
+from test.bench import results
+from core.msg import msgabc, msgftr, msglog
+from core.msgc import mc
+
+_MODULES = ('projectzomboid', 'factorio', 'valheim', 'hytale', 'sevendaystodie',
+            'unturned', 'csii', 'palworld', 'starbound', 'teamspeak', 'testserver')
+_LINES = (
+    'LOG  : General     f:0, t:1733986293628> version=41.78.16 demo=false',
+    '[12-12-25 18:31:34.628] 76561197968989085 "Apollo" fully connected (10856,9894,0).',
+    '2025-10-08 08:58:52 [CHAT] bsalis: hello everyone',
+    '04/13/2025 22:28:32: Valheim version: l-0.220.5 (network version 34)',
+    '06/28/2025 14:37:28: Got handshake from client 123456789',
+    'WARNING: Something happened that was not expected but is harmless enough',
+    '[2026/01/13 09:14:45   INFO] [World|default] Player \'Apollo\' joined world \'default\'',
+    '3.804 Info ServerRouter.cpp:547: Own address is IP ADDR:({14.237.58.218:34197}) (confirmed by pingpong2)',
+    'INF [Steamworks.NET] Authenticating player: Apollo SteamId: 76561197968989085 TicketLen: 1024 Result: OK')
+_PASSES = 200
+
+
+def _subscriber_filters(module) -> list:
+    result = []
+    for _, clazz in inspect.getmembers(module, inspect.isclass):
+        if clazz.__module__ != module.__name__ or not issubclass(clazz, msgabc.AbcSubscriber):
+            continue
+        required = [p for p in inspect.signature(clazz).parameters.values() if p.default is inspect.Parameter.empty]
+        try:
+            result.append(clazz(*([None] * len(required))).msg_filter())
+        except Exception:
+            pass
+    return result
+
+
+def _filter_sets() -> dict:
+    result = {}
+    for name in _MODULES:
+        module = importlib.import_module('servers.' + name + '.messaging')
+        filters = [o for o in vars(module).values() if isinstance(o, msgabc.Filter)]
+        filters.extend(_subscriber_filters(module))
+        result[name] = filters
+    return result
+
+
+def _data_matches(msg_filter: msgabc.Filter) -> list:
+    if isinstance(msg_filter, msgftr.DataMatches):
+        return [msg_filter]
+    if isinstance(msg_filter, msgftr.Not):
+        return _data_matches(msg_filter._msg_filter)
+    if isinstance(msg_filter, (msgftr.And, msgftr.Or)):
+        return [o for child in msg_filter._msg_filters for o in _data_matches(child)]
+    return []
+
+
+def _messages() -> tuple:
+    messages = [msgabc.Message('bench', mc.ServerProcess.STDOUT_LINE, line) for line in _LINES]
+    messages.append(msgabc.Message('bench', mc.ServerProcess.STDERR_LINE, _LINES[5]))
+    messages.append(msgabc.Message('bench', msglog.LogPublisher.LOG, 'START Install'))
+    messages.append(msgabc.Message('bench', mc.ServerStatus.UPDATED, {'running': True}))
+    messages.append(msgabc.Message('bench', mc.ServerProcess.STATE_STARTED, None))
+    return tuple(messages)
+
+
+def _regex_only(msg_filter: msgftr.DataMatches) -> typing.Callable:
+    match = msg_filter._pattern.match
+
+    def regex_only(message):
+        return match(str(message.data())) is not None
+    return regex_only
+
+
+def _match_time(lines: tuple, predicates: list) -> float:
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(_PASSES):
+            for line in lines:
+                message = msgabc.Message('bench', mc.ServerProcess.STDOUT_LINE, line)
+                for predicate in predicates + predicates:  # Once when filtering and once again in the handler
+                    predicate(message)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _accept_rate(predicates: list, messages: tuple) -> float:
+    start = time.perf_counter()
+    for _ in range(_PASSES):
+        for message in messages:
+            for predicate in predicates:
+                predicate(message)
+    return (_PASSES * len(messages) * len(predicates)) / (time.perf_counter() - start)
+
+
+class BenchCoreMsgFtr(unittest.TestCase):
+
+    def test_compiled_accept_rate(self):
+        messages = _messages()
+        for name, filters in _filter_sets().items():
+            interpreted = [o.accepts for o in filters]
+            compiled = [msgftr.compile_filter(o) for o in filters]
+            for message in messages:
+                self.assertEqual([p(message) for p in interpreted], [p(message) for p in compiled])
+            before, after = _accept_rate(interpreted, messages), _accept_rate(compiled, messages)
+            print(f'\nfilters module={name} count={len(filters)}'
+                  f' interpreted={before:.0f}/s compiled={after:.0f}/s speedup={after / before:.2f}x')
+            results.record('msgftr.accept', dict(module=name, filters=len(filters)),
+                           interpreted_per_sec=before, compiled_per_sec=after)
+
+    def test_data_matches_rate(self):
+        lines = _LINES + tuple('LOG  : General     f:0, t:17339862> Loading chunk ' + str(i) for i in range(30))
+        for name, filters in _filter_sets().items():
+            data_matches = []
+            for msg_filter in filters:
+                data_matches.extend(_data_matches(msg_filter))
+            if not data_matches:
+                continue
+            before = _match_time(lines, [_regex_only(o) for o in data_matches])
+            after = _match_time(lines, [msgftr.compile_filter(o) for o in data_matches])
+            count = _PASSES * len(lines)
+            before, after = before * 1000000.0 / count, after * 1000000.0 / count
+            print(f'\nmatches module={name} patterns={len(data_matches)}'
+                  f' regex={before:.2f}us/line prefiltered={after:.2f}us/line')
+            results.record('msgftr.matches', dict(module=name, patterns=len(data_matches)),
+                           regex_us_per_line=before, prefiltered_us_per_line=after)
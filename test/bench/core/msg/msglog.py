@@ -0,0 +1,69 @@
+import time
+import asyncio
+import tempfile
+import unittest
+from test.bench import results
+import aiofiles
+from core.util import funcutil
+from core.msg import msgabc, msgftr, msgsvc, msglog, msgtrf
+
+_LINES = 20000
+
+
+class _AiofilesLogfileSubscriber(msgabc.AbcSubscriber, msgabc.BatchHandler):
+    # Previous LogfileSubscriber, writing and flushing each batch through aiofiles
+
+    def __init__(self, filename: str, batch_size: int):
+        super().__init__(msgftr.AcceptAll())
+        self._filename, self._file, self._batch_size = filename, None, batch_size
+
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    async def handle(self, message):
+        if message is msgabc.STOP:
+            await funcutil.silently_cleanup(self._file)
+            return True
+        return await self.handle_batch((message,))
+
+    async def handle_batch(self, messages):
+        if self._file is None:
+            self._file = await aiofiles.open(self._filename, mode='w')
+        lines = [message.data() for message in messages]
+        lines.append('')
+        await self._file.write('\n'.join(lines))
+        await self._file.flush()
+        return None
+
+
+async def _logfile_rate(subscriber: msgabc.Subscriber) -> float:
+    mailer = msgsvc.TaskMailer(subscriber)
+    mailer.start()
+    start = time.perf_counter()
+    for i in range(_LINES):
+        mailer.post('bench', 'bench.Line', 'LOG  : General     f:0, t:17339862> Loading chunk ' + str(i))
+        if i % 100 == 0:
+            await asyncio.sleep(0)  # Let the writer run while lines are produced
+    await mailer.stop()
+    return _LINES / (time.perf_counter() - start)
+
+
+class BenchCoreMsgLog(unittest.TestCase):
+
+    def test_logfile_throughput(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for batch_size in (1, 10, 100, 1000):
+                filename = directory + '/aiofiles-' + str(batch_size) + '.log'
+                rate = asyncio.run(_logfile_rate(_AiofilesLogfileSubscriber(filename, batch_size)))
+                print(f'\nlogfile aiofiles batch_size={batch_size} lines={_LINES} rate={rate:.0f}/s')
+                results.record('msglog.logfile', dict(
+                    writer='aiofiles', batch_size=batch_size, lines=_LINES), lines_per_sec=rate)
+                for flush_size in (0, msglog.LogfileSubscriber.FLUSH_SIZE):
+                    filename = directory + '/buffered-' + str(batch_size) + '-' + str(flush_size) + '.log'
+                    subscriber = msglog.LogfileSubscriber(
+                        filename, transformer=msgtrf.GetData(), batch_size=batch_size, flush_size=flush_size)
+                    rate = asyncio.run(_logfile_rate(subscriber))
+                    print(f'logfile buffered batch_size={batch_size} flush_size={flush_size} rate={rate:.0f}/s')
+                    results.record('msglog.logfile', dict(
+                        writer='buffered', batch_size=batch_size, flush_size=flush_size, lines=_LINES),
+                        lines_per_sec=rate)
@@ -0,0 +1,111 @@
+import time
+import asyncio
+import tracemalloc
+import unittest
+import statistics
+from test.bench import results
+from asyncio import streams
+from core.msg import msgabc, msgpipe
+
+_LINES, _LINE_RATES, _LATENCY_SECONDS = 50000, (1000, 10000, 50000), 0.5
+_LINE = b'LOG  : General     f:0, t:17339862> Loading chunk 1234 of world save\n'
+
+
+class _DictMessage:  # Same shape as msgabc.Message without slots
+
+    def __init__(self, source, name, data=None, reply_to=None):
+        self._created = time.time()
+        self._source = source
+        self._name = name
+        self._data = data
+        self._reply_to = reply_to
+        self._matches = None
+
+
+class _CountingMailer(msgabc.Mailer):
+
+    def __init__(self):
+        self.count = 0
+
+    def post(self, *vargs):
+        self.count += 1
+        return True
+
+
+class _LatencyMailer(msgabc.Mailer):
+
+    def __init__(self):
+        self.latencies = []
+
+    def post(self, *vargs):
+        message = msgabc.Message.from_vargs(*vargs)
+        if message.name() == 'bench.Line':
+            self.latencies.append(time.perf_counter() - float(message.data()))
+        return True
+
+
+def _bytes_per_message(factory: type) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    messages = [factory('bench', 'bench.Line', 'line') for _ in range(_LINES)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del messages
+    return size / _LINES
+
+
+async def _producer_rate(chunk_size: int = 0) -> float:
+    pipe, mailer = streams.StreamReader(), _CountingMailer()
+    for _ in range(_LINES):
+        pipe.feed_data(_LINE)
+    pipe.feed_eof()
+    start = time.perf_counter()
+    producer = msgpipe.PipeOutLineProducer(mailer, 'bench', 'bench.Line', pipe, chunk_size=chunk_size)
+    await producer.close()
+    elapsed = time.perf_counter() - start
+    assert mailer.count == _LINES + 2  # Lines plus publisher start and end
+    return _LINES / elapsed
+
+
+async def _producer_latency(rate: int) -> tuple:
+    pipe, mailer = streams.StreamReader(), _LatencyMailer()
+    producer = msgpipe.PipeOutLineProducer(mailer, 'bench', 'bench.Line', pipe)
+    chunk, count = max(1, rate // 100), int(rate * _LATENCY_SECONDS)
+    start = time.perf_counter()
+    for i in range(0, count, chunk):
+        pipe.feed_data(b''.join(str(time.perf_counter()).encode() + b'\n' for _ in range(chunk)))
+        await asyncio.sleep(max(0.0, start + (i + chunk) / rate - time.perf_counter()))
+    pipe.feed_eof()
+    await producer.close()
+    latencies = sorted(mailer.latencies)
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+class BenchCoreMsgPipe(unittest.TestCase):
+
+    def test_message_size(self):
+        slotted, unslotted = _bytes_per_message(msgabc.Message), _bytes_per_message(_DictMessage)
+        print(f'\nmessage bytes slotted={slotted:.0f} unslotted={unslotted:.0f}')
+        results.record('msgabc.message', dict(messages=_LINES), slotted_bytes=slotted, unslotted_bytes=unslotted)
+        self.assertLess(slotted, unslotted)
+
+    def test_pipe_producer_rate(self):
+        for monotonic in (False, True):
+            msgabc.Message.use_monotonic_clock(monotonic)
+            rate = asyncio.run(_producer_rate())
+            print(f'\npipe producer monotonic={monotonic} lines={_LINES} rate={rate:.0f}/s')
+            results.record('msgpipe.producer', dict(monotonic=monotonic, lines=_LINES), lines_per_sec=rate)
+        msgabc.Message.use_monotonic_clock(False)
+
+    def test_pipe_producer_chunked(self):
+        for chunk_size in (0, 4096, msgpipe.PipeOutLineProducer.CHUNK_SIZE):
+            rate = asyncio.run(_producer_rate(chunk_size))
+            print(f'\npipe producer chunk_size={chunk_size} lines={_LINES} rate={rate:.0f}/s')
+            results.record('msgpipe.chunked', dict(chunk_size=chunk_size, lines=_LINES), lines_per_sec=rate)
+
+    def test_pipe_producer_latency(self):
+        for rate in _LINE_RATES:
+            median, p99 = asyncio.run(_producer_latency(rate))
+            median, p99 = median * 1000000.0, p99 * 1000000.0
+            print(f'\npipe latency rate={rate}/s median={median:.0f}us p99={p99:.0f}us')
+            results.record('msgpipe.latency', dict(rate=rate), median_us=median, p99_us=p99)
@@ -0,0 +1,156 @@
+import time
+import asyncio
+import unittest
+import tempfile
+import statistics
+from test.bench import results
+from core.msg import msgabc, msgsvc, msgftr, msgext, msglog
+from core.msgc import mc
+from core.context import contextsvc
+
+_SUBSCRIBER_COUNTS, _MESSAGES, _REQUESTS = (10, 100, 1000), 2000, 500
+_LINE_RATES, _LATENCY_SECONDS = (1000, 10000, 50000), 0.5
+_FLOOD, _CONTROLS = 2000, 20
+
+
+class _NoopSubscriber(msgabc.AbcSubscriber):
+
+    def handle(self, message):
+        return None
+
+
+async def _fanout(names: tuple, indexed: bool) -> float:
+    mailer = msgsvc.TaskMulticastMailer(indexed=indexed)
+    mailer.start()
+    for name in names:
+        mailer.register(_NoopSubscriber(msgftr.NameIs(name)))
+    start = time.perf_counter()
+    for _ in range(_MESSAGES):
+        mailer.post('bench', names[0], 'payload')
+    await mailer._join_queue()
+    elapsed = time.perf_counter() - start
+    await mailer.stop()
+    return elapsed
+
+
+class _LatencySubscriber(msgabc.AbcSubscriber):
+
+    def __init__(self):
+        super().__init__(msgftr.NameIs('bench.Line'))
+        self.latencies = []
+
+    def handle(self, message):
+        self.latencies.append(time.perf_counter() - message.data())
+        return None
+
+
+async def _post_latency(rate: int) -> tuple:
+    mailer, subscriber = msgsvc.TaskMulticastMailer(indexed=True), _LatencySubscriber()
+    mailer.start()
+    mailer.register(subscriber)
+    chunk, posting, count = max(1, rate // 100), 0.0, int(rate * _LATENCY_SECONDS)
+    start = time.perf_counter()
+    for i in range(count):
+        before = time.perf_counter()
+        mailer.post('bench', 'bench.Line', before)
+        posting += time.perf_counter() - before
+        if i % chunk == chunk - 1:  # Pace lines in chunks, as a game server flushes stdout
+            await asyncio.sleep(max(0.0, start + (i + 1) / rate - time.perf_counter()))
+    await mailer.stop()
+    latencies = sorted(subscriber.latencies)
+    return (posting / count, statistics.median(latencies),
+            latencies[int(len(latencies) * 0.99)], count / (time.perf_counter() - start))
+
+
+class _StopSubscriber(msgabc.AbcSubscriber):
+
+    def __init__(self):
+        super().__init__(msgftr.NameIs(mc.ServerService.STOP))
+        self.latencies = []
+
+    def handle(self, message):
+        self.latencies.append(time.perf_counter() - message.data())
+        return None
+
+
+async def _stop_latency(priority: bool) -> tuple:
+    context = contextsvc.Context({})
+    if not priority:
+        context._mailer = msgsvc.TaskMulticastMailer(indexed=True)  # FIFO dispatcher, as before priority lanes
+    context.start()
+    subscriber = _StopSubscriber()
+    with tempfile.TemporaryDirectory() as directory:
+        context.register(msglog.LogfileSubscriber(directory + '/console.log', mc.ServerProcess.FILTER_STDOUT_LINE))
+        context.register(subscriber)
+        for _ in range(_CONTROLS):
+            for _ in range(_FLOOD):
+                context.post('bench', mc.ServerProcess.STDOUT_LINE, 'LOG  : General     f:0, t:17339862> Loading chunk')
+            context.post('bench', mc.ServerService.STOP, time.perf_counter())
+            await asyncio.sleep(0.05)
+        await context.shutdown()
+    latencies = sorted(subscriber.latencies)
+    return statistics.median(latencies), latencies[-1]
+
+
+class _UncorrelatedMailer(msgsvc.TaskMulticastMailer):
+
+    def correlate(self, request):
+        return None
+
+
+async def _requests(names: tuple, correlated: bool) -> float:
+    mailer = msgsvc.TaskMulticastMailer(indexed=True) if correlated else _UncorrelatedMailer(indexed=True)
+    mailer.start()
+    for name in names:
+        mailer.register(_NoopSubscriber(msgftr.NameIs(name)))
+    mailer.register(msgext.SetGetSubscriber(mailer, 'bench.get', 'bench.set', 'bench.response', 'value'))
+    messenger = msgext.SynchronousMessenger(mailer)
+    start = time.perf_counter()
+    for _ in range(_REQUESTS):
+        await messenger.request('bench', 'bench.get')
+    elapsed = time.perf_counter() - start
+    await mailer.stop()
+    return elapsed
+
+
+class BenchCoreMsgSvc(unittest.TestCase):
+
+    def test_multicast_fanout(self):
+        for count in _SUBSCRIBER_COUNTS:
+            names = tuple('bench.' + str(i) for i in range(count))
+            linear, indexed = asyncio.run(_fanout(names, False)), asyncio.run(_fanout(names, True))
+            linear, indexed = linear * 1000000.0 / _MESSAGES, indexed * 1000000.0 / _MESSAGES
+            print(f'\nfanout subscribers={count} messages={_MESSAGES}'
+                  f' linear={linear:.2f}us/msg indexed={indexed:.2f}us/msg')
+            results.record('msgsvc.fanout', dict(subscribers=count, messages=_MESSAGES),
+                           linear_us_per_msg=linear, indexed_us_per_msg=indexed)
+            self.assertLess(indexed, linear * 2.0)
+
+    def test_request_reply(self):
+        for count in _SUBSCRIBER_COUNTS:
+            names = tuple('bench.' + str(i) for i in range(count))
+            catcher, correlated = asyncio.run(_requests(names, False)), asyncio.run(_requests(names, True))
+            self.assertLess(correlated, catcher * 2.0)
+            catcher, correlated = catcher * 1000000.0 / _REQUESTS, correlated * 1000000.0 / _REQUESTS
+            print(f'\nrequests subscribers={count} requests={_REQUESTS}'
+                  f' catcher={catcher:.2f}us/req correlated={correlated:.2f}us/req')
+            results.record('msgsvc.request', dict(subscribers=count, requests=_REQUESTS),
+                           catcher_us_per_req=catcher, correlated_us_per_req=correlated)
+
+    def test_post_latency(self):
+        for rate in _LINE_RATES:
+            posting, median, p99, achieved = asyncio.run(_post_latency(rate))
+            posting, median, p99 = posting * 1000000.0, median * 1000000.0, p99 * 1000000.0
+            print(f'\nlatency rate={rate}/s achieved={achieved:.0f}/s'
+                  f' post={posting:.2f}us median={median:.0f}us p99={p99:.0f}us')
+            results.record('msgsvc.latency', dict(rate=rate), achieved_per_sec=achieved,
+                           post_us=posting, median_us=median, p99_us=p99)
+
+    def test_control_latency(self):
+        fifo, laned = asyncio.run(_stop_latency(False)), asyncio.run(_stop_latency(True))
+        fifo, laned = [o * 1000.0 for o in fifo], [o * 1000.0 for o in laned]
+        print(f'\ncontrol latency flood={_FLOOD} controls={_CONTROLS}'
+              f' fifo median={fifo[0]:.2f}ms max={fifo[1]:.2f}ms laned median={laned[0]:.2f}ms max={laned[1]:.2f}ms')
+        results.record('msgsvc.control', dict(flood=_FLOOD, controls=_CONTROLS),
+                       fifo_median_ms=fifo[0], fifo_max_ms=fifo[1], laned_median_ms=laned[0], laned_max_ms=laned[1])
+        self.assertLess(laned[0], fifo[0])
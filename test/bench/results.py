@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import time
+import atexit
+import platform
+import typing
+
+_ENV_OUTPUT = 'BENCH_RESULTS'
+
+
+class _Results:
+
+    def __init__(self):
+        self._results: typing.List[dict] = []
+        self._registered = False
+
+    def record(self, bench: str, case: dict, metrics: dict):
+        if not self._registered:
+            atexit.register(self.write)
+            self._registered = True
+        self._results.append(dict(bench=bench, case=case, metrics=metrics))
+
+    def write(self, path: typing.Optional[str] = None) -> typing.Optional[str]:
+        path = path if path else os.environ.get(_ENV_OUTPUT)
+        if not path or not self._results:
+            return None
+        document = dict(
+            timestamp=int(time.time()), python=platform.python_version(),
+            implementation=platform.python_implementation(), machine=platform.machine(),
+            platform=sys.platform, results=self._results)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(document, file, indent=2)
+            file.write('\n')
+        if self._registered:
+            atexit.unregister(self.write)
+            self._registered = False
+        return path
+
+
+_RESULTS = _Results()
+
+
+def record(bench: str, case: dict, **metrics):
+    _RESULTS.record(bench, case, metrics)
+
+
+def write(path: typing.Optional[str] = None) -> typing.Optional[str]:
+    return _RESULTS.write(path)
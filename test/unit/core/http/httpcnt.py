@@ -60,3 +60,5 @@ class TestCoreHttpHttpCnt(unittest.TestCase):
         self.assertTrue(httpcnt.ContentTypeImpl.lookup('/path/file.log.backup').is_text_type())
         self.assertFalse(httpcnt.ContentTypeImpl.lookup('/path/file.log.gif').is_text_type())
         self.assertFalse(httpcnt.ContentTypeImpl.lookup('/path/file.log.1.2').is_text_type())
+        self.assertEqual('application/gzip', httpcnt.ContentTypeImpl.lookup(
+            '/path/file.log.20240101-120000.gz').mime_type())
@@ -70,3 +70,17 @@ class TestCoreHttpHttpRsc(unittest.TestCase):
         resource = root.lookup(url.path)
         self.assertEqual('/foo/bar', resource.path())
         self.assertEqual('/foo/yay/x/y/z', resource.path({'bar': 'yay', 'tail': 'x/y/z'}))
+
+    def test_lookup_after_remove(self):
+        root = httprsc.WebResource()
+        httprsc.ResourceBuilder(root).psh('foo').psh('{key}').put('bar').pop().pop().psh('baz').put('*{tail}')
+        self.assertEqual('bar', root.lookup('/foo/value/bar').name())
+        self.assertEqual('tail', root.lookup('/baz/x/y').name())
+        self.assertIsNone(root.lookup('/foo/value/nope'))
+        root.child('foo').remove('key')
+        self.assertIsNone(root.lookup('/foo/value/bar'))
+        self.assertEqual('foo', root.lookup('/foo').name())
+        httprsc.ResourceBuilder(root.child('foo')).put('{other}')
+        self.assertEqual('other', root.lookup('/foo/value').name())
+        root.remove('baz')
+        self.assertIsNone(root.lookup('/baz/x/y'))
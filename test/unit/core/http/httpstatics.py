@@ -0,0 +1,52 @@
+import unittest
+import gzip
+from aiohttp.test_utils import make_mocked_request
+from core.http import httpcnt, httpstatics
+
+
+class _Loader:
+
+    def __init__(self, files):
+        self._files, self.loads = files, 0
+
+    async def load(self, path):
+        self.loads += 1
+        data = self._files.get(path)
+        return httpstatics._Resource(httpcnt.ContentTypeImpl.lookup(path), data, 1700000000) if data else None
+
+
+class TestCoreHttpStatics(unittest.IsolatedAsyncioTestCase):
+
+    async def test_etag_and_not_modified(self):
+        statics = httpstatics.Statics()
+        statics._loader = httpstatics._CacheLoader(loader=_Loader({'/app.js': b'let x = 1;\n' * 100}))
+        response = await statics.handle(make_mocked_request('GET', '/app.js', headers={'Accept-Encoding': 'gzip'}))
+        self.assertEqual(200, response.status)
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertEqual(b'let x = 1;\n' * 100, gzip.decompress(response.body))
+        etag = response.headers['ETag']
+        self.assertTrue(etag.endswith('-gz"'))
+        response = await statics.handle(make_mocked_request(
+            'GET', '/app.js', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}))
+        self.assertEqual(304, response.status)
+        self.assertIsNone(response.body)
+        response = await statics.handle(make_mocked_request('GET', '/app.js', headers={'If-None-Match': etag}))
+        self.assertEqual(200, response.status)
+        self.assertNotIn('Content-Encoding', response.headers)
+        response = await statics.handle(make_mocked_request(
+            'GET', '/app.js', headers={'If-Modified-Since': response.headers['Last-Modified']}))
+        self.assertEqual(304, response.status)
+
+    async def test_cache_eviction(self):
+        loader = _Loader({'/a.png': b'a' * 40, '/b.png': b'b' * 40, '/c.png': bytes(range(256))})
+        cache = httpstatics._CacheLoader(350, loader)
+        await cache.load('/a.png')
+        await cache.load('/b.png')
+        await cache.load('/a.png')
+        self.assertEqual(2, loader.loads)
+        await cache.load('/c.png')
+        self.assertLessEqual(cache.size(), 350)
+        await cache.load('/a.png')
+        self.assertEqual(3, loader.loads)
+        await cache.load('/b.png')
+        self.assertEqual(4, loader.loads)
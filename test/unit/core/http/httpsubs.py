@@ -0,0 +1,60 @@
+import unittest
+import asyncio
+from core.util import aggtrf, util
+from core.msg import msgabc, msgsvc, msgftr
+from core.http import httpsubs
+
+
+class TestCoreHttpSubs(unittest.IsolatedAsyncioTestCase):
+
+    async def test_event_stream(self):
+        mailer = msgsvc.TaskMulticastMailer()
+        mailer.start()
+        service = httpsubs.HttpSubscriptionService(mailer)
+        selector = httpsubs.Selector.from_argv(msgftr.NameIs('line'), aggtrf.StrJoin('\n'), msgftr.NameIs('done'))
+        path = await httpsubs.HttpSubscriptionService.subscribe(mailer, self, selector)
+        identity = util.fname(path)
+        handler = service.subscriptions_handler('identity')
+        stream = await handler.handle_get(None, {'identity': identity, 'stream': 'sse'})
+        self.assertEqual('text/event-stream', stream.content_type().mime_type())
+        self.assertIsNone(stream.content_length())
+        heartbeat = type(stream).HEARTBEAT
+        type(stream).HEARTBEAT = 0.05
+        try:
+            self.assertEqual(b': heartbeat\n\n', await stream.read())
+            mailer.post(self, 'line', 'one')
+            mailer.post(self, 'line', 'two')
+            await asyncio.sleep(0.01)
+            self.assertEqual(b'id: 1\ndata: "one\\ntwo"\n\n', await stream.read())
+            mailer.post(self, 'done', None)
+            self.assertEqual(b'event: end\ndata: {}\n\n', await stream.read())
+            self.assertEqual(b'', await stream.read())
+        finally:
+            type(stream).HEARTBEAT = heartbeat
+        await mailer.stop()
+
+    async def test_shared_feed(self):
+        mailer = msgsvc.TaskMulticastMailer()
+        mailer.start()
+        service = httpsubs.HttpSubscriptionService(mailer)
+        selector = httpsubs.Selector.from_argv(msgftr.NameIs('line'))
+        first = util.fname(await httpsubs.HttpSubscriptionService.subscribe(mailer, self, selector))
+        second = util.fname(await httpsubs.HttpSubscriptionService.subscribe(mailer, self, selector))
+        first, second = service.lookup(first), service.lookup(second)
+        self.assertIs(first.feed(), second.feed())
+        self.assertEqual((1000, msgabc.OverflowPolicy.DROP_OLDEST), first.feed().queue_limits())
+        mailer.post(self, 'line', 'one')
+        mailer.post(self, 'line', 'two')
+        self.assertEqual('one', await first.get(1.0))
+        self.assertEqual('two', await first.get(1.0))
+        self.assertEqual('one', await second.get(1.0))
+        self.assertEqual('two', await second.get(1.0))
+        self.assertIsNone(await second.get(0.01))
+        httpsubs.HttpSubscriptionService.unsubscribe(mailer, self, first.identity())
+        await asyncio.sleep(0.01)
+        self.assertIsNone(service.lookup(first.identity()))
+        self.assertFalse(second.feed().expired())
+        httpsubs.HttpSubscriptionService.unsubscribe(mailer, self, second.identity())
+        await asyncio.sleep(0.01)
+        self.assertTrue(second.feed().expired())
+        await mailer.stop()
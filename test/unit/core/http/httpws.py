@@ -0,0 +1,77 @@
+import unittest
+import asyncio
+from yarl import URL
+from aiohttp import WSMessage, WSMsgType
+from core.util import aggtrf, objconv
+from core.msg import msgsvc, msgftr
+from core.http import httpabc, httprsc, httpsubs, httpws
+
+
+class _Socket:
+
+    def __init__(self):
+        self.closed, self.incoming, self.sent = False, asyncio.Queue(), asyncio.Queue()
+
+    def receive(self, **kwargs):
+        self.incoming.put_nowait(WSMessage(WSMsgType.TEXT, objconv.obj_to_json(kwargs), None))
+
+    async def send_str(self, data: str):
+        self.sent.put_nowait(objconv.json_to_dict(data))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class _PlainHandler(httpabc.GetHandler):
+
+    def handle_get(self, resource, data):
+        return {'plain': True}
+
+
+class TestCoreHttpWs(unittest.IsolatedAsyncioTestCase):
+
+    async def test_multiplexed_channels(self):
+        mailer, root = msgsvc.TaskMulticastMailer(), httprsc.WebResource()
+        mailer.start()
+        service = httpsubs.HttpSubscriptionService(mailer)
+        builder = httprsc.ResourceBuilder(root)
+        builder.psh(service.resource(root, 'subscriptions'))
+        builder.put('{identity}', service.subscriptions_handler('identity'))
+        builder.pop().put('plain', _PlainHandler())
+        lines = await httpsubs.HttpSubscriptionService.subscribe(
+            mailer, self, httpsubs.Selector.from_argv(msgftr.NameIs('line'), aggtrf.StrJoin('\n')))
+        status = await httpsubs.HttpSubscriptionService.subscribe(
+            mailer, self, httpsubs.Selector.from_argv(msgftr.NameIs('status'), msgftr.NameIs('done')))
+        socket = _Socket()
+        session = httpws.WebSocketSession(socket, root, URL('http://localhost:6164/websocket'), True)
+        running = asyncio.create_task(session.run())
+        socket.receive(channel='lines', subscribe='http://localhost:6164' + lines, credit=1)
+        socket.receive(channel='status', subscribe=status)
+        socket.receive(channel='nope', subscribe='/nope')
+        self.assertEqual({'channel': 'nope', 'error': 'not found'}, await socket.sent.get())
+        socket.receive(channel='plain', subscribe='/plain')
+        self.assertEqual({'channel': 'plain', 'error': 'not found'}, await socket.sent.get())
+        socket.incoming.put_nowait(WSMessage(WSMsgType.TEXT, '{not json', None))
+        self.assertEqual({'error': 'bad request'}, await socket.sent.get())
+        socket.receive(channel='lines', ack={})
+        self.assertEqual({'channel': 'lines', 'error': 'bad request'}, await socket.sent.get())
+        await asyncio.sleep(0.01)
+        mailer.post(self, 'line', 'one')
+        self.assertEqual({'channel': 'lines', 'data': 'one'}, await socket.sent.get())
+        mailer.post(self, 'line', 'two')
+        mailer.post(self, 'status', {'state': 'STARTED'})
+        self.assertEqual({'channel': 'status', 'data': {'state': 'STARTED'}}, await socket.sent.get())
+        self.assertTrue(socket.sent.empty())  # Lines channel has no credit left
+        socket.receive(channel='lines', ack=1)
+        self.assertEqual({'channel': 'lines', 'data': 'two'}, await socket.sent.get())
+        mailer.post(self, 'done', None)
+        self.assertEqual({'channel': 'status', 'end': True}, await socket.sent.get())
+        socket.incoming.put_nowait(None)
+        await running
+        await mailer.stop()
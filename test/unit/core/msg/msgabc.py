@@ -0,0 +1,36 @@
+import time
+import unittest
+from core.msg import msgabc
+
+
+class TestCoreMsgAbc(unittest.TestCase):
+
+    def test_message_slots(self):
+        message = msgabc.Message('source', 'name')
+        with self.assertRaises(AttributeError):
+            setattr(message, 'extra', True)
+
+    def test_message_monotonic_clock(self):
+        before = msgabc.Message('source', 'name')
+        try:
+            msgabc.Message.use_monotonic_clock()
+            first, second = msgabc.Message('source', 'name'), msgabc.Message('source', 'name')
+            self.assertLessEqual(first.created(), second.created())
+            self.assertAlmostEqual(time.time(), second.created(), delta=1.0)
+            self.assertAlmostEqual(time.time(), before.created(), delta=1.0)
+        finally:
+            msgabc.Message.use_monotonic_clock(False)
+        self.assertAlmostEqual(time.time(), msgabc.Message('source', 'name').created(), delta=1.0)
+        self.assertAlmostEqual(time.time(), first.created(), delta=1.0)
+        self.assertAlmostEqual(time.time(), msgabc.STOP.created(), delta=60.0)
+
+    def test_message_derive(self):
+        calls = []
+
+        def derivation(message):
+            calls.append(message)
+            return message.data().upper()
+        message = msgabc.Message('source', 'name', 'data')
+        self.assertEqual('DATA', message.derive(derivation))
+        self.assertEqual('DATA', message.derive(derivation))
+        self.assertEqual(1, len(calls))
@@ -0,0 +1,30 @@
+import unittest
+from core.util import aggtrf
+from core.msg import msgabc, msgext, msgftr, msgtrf
+
+
+class TestCoreMsgExt(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        buffer = msgext.RingBuffer(3)
+        self.assertEqual([], buffer.since())
+        buffer.append('a')
+        buffer.append('b')
+        self.assertEqual(['a', 'b'], buffer.since())
+        self.assertEqual(['b'], buffer.since(1))
+        self.assertEqual([], buffer.since(2))
+        buffer.append('c')
+        buffer.append('d')
+        self.assertEqual(4, buffer.sequence())
+        self.assertEqual(['b', 'c', 'd'], buffer.since())
+        self.assertEqual(['c', 'd'], buffer.since(2))
+        self.assertEqual([], buffer.since(9))
+
+    def test_rolling_log(self):
+        log = msgext.RollingLogSubscriber(2, msgftr.AcceptAll(), msgtrf.GetData(), aggtrf.StrJoin('\n'))
+        log.handle_batch([msgabc.Message('test', 'line', 'one'), msgabc.Message('test', 'line', 'two')])
+        sequence, lines = log.since(0)
+        self.assertEqual((2, ['one', 'two']), (sequence, lines))
+        log.handle(msgabc.Message('test', 'line', 'three'))
+        self.assertEqual((3, ['three']), log.since(sequence))
+        self.assertEqual('two\nthree', log.get())
@@ -0,0 +1,58 @@
+import unittest
+from core.msg import msgabc, msgftr
+
+
+class TestCoreMsgFtr(unittest.TestCase):
+
+    def test_names(self):
+        self.assertEqual({'a'}, msgftr.NameIs('a').names())
+        self.assertEqual({'a', 'b'}, msgftr.NameIn('a', 'b').names())
+        self.assertIsNone(msgftr.AcceptAll().names())
+        self.assertIsNone(msgftr.Not(msgftr.NameIs('a')).names())
+
+    def test_names_and_or(self):
+        self.assertEqual({'a'}, msgftr.And(msgftr.NameIn('a', 'b'), msgftr.DataEquals(1), msgftr.NameIs('a')).names())
+        self.assertEqual({'a', 'b'}, msgftr.Or(msgftr.NameIs('a'), msgftr.NameIs('b'), msgftr.IsStop()).names())
+        self.assertIsNone(msgftr.Or(msgftr.NameIs('a'), msgftr.DataEquals(1)).names())
+
+    def test_compile_filter(self):
+        msg_filter = msgftr.And(
+            msgftr.Or(msgftr.DataMatches(r'^hello.*'), msgftr.DataStrContains('world'),
+                      msgftr.DataStrContains('TOKEN', True)),
+            msgftr.And(msgftr.NameIs('a'), msgftr.Not(msgftr.Not(msgftr.NameIs('a')))))
+        predicate = msgftr.compile_filter(msg_filter)
+        for name, data in (('a', 'hello there'), ('a', 'big world'), ('a', 'nope'), ('b', 'hello there'),
+                           ('a', 'a Token'), ('a', None)):
+            message = msgabc.Message('source', name, data)
+            self.assertEqual(msg_filter.accepts(message), predicate(message))
+
+    def test_compile_filter_optimised(self):
+        stdout = msgftr.NameIs('stdout')
+        msg_filter = msgftr._optimise(msgftr.And(
+            msgftr.DataMatches(r'^hello.*'), msgftr.And(stdout, msgftr.AcceptAll()), stdout))
+        self.assertIsInstance(msg_filter, msgftr.And)
+        self.assertEqual(2, len(msg_filter._msg_filters))
+        self.assertIs(stdout, msg_filter._msg_filters[0])
+        self.assertIsInstance(msgftr._optimise(msgftr.Or(msgftr.NameIs('a'), msgftr.AcceptAll())), msgftr.AcceptAll)
+
+    def test_data_matches_literal(self):
+        self.assertEqual('> version=', msgftr.DataMatches(r'.*> version=(.*?) .*')._literal)
+        self.assertEqual('" fully connected (', msgftr.DataMatches(r'^\[.*\] "(.*?)" fully connected \(.*')._literal)
+        self.assertEqual('ab', msgftr.DataMatches(r'abc?d{2,3}x')._literal)
+        self.assertEqual('] Error', msgftr.DataMatches(r'^\[(ERROR|WARN)\] Error')._literal)
+        self.assertIsNone(msgftr.DataMatches(r'abc|def')._literal)
+        self.assertIsNone(msgftr.DataMatches(r'(?i)hello')._literal)
+
+    def test_data_matches_literal_escapes(self):
+        for regex in (r'\x41BC', r'\u0041BC', r'\U00000041BC', r'\101BC', r'\N{LATIN CAPITAL LETTER A}BC'):
+            self.assertEqual('BC', msgftr.DataMatches(regex)._literal)
+            self.assertTrue(msgftr.DataMatches(regex).accepts(msgabc.Message(self, 'test', 'ABC')))
+        self.assertEqual('BC', msgftr.DataMatches(r'(a)\1BC')._literal)
+        self.assertEqual('x', msgftr.DataMatches(r'\dx')._literal)
+
+    def test_data_matches_memo(self):
+        msg_filter = msgftr.DataMatches(r'^hello (.*)$')
+        message = msgabc.Message('source', 'name', 'hello world')
+        self.assertTrue(msg_filter.accepts(message))
+        self.assertEqual('world', message.derived()[msg_filter._pattern].group(1))
+        self.assertFalse(msg_filter.accepts(msgabc.Message('source', 'name', 'goodbye world')))
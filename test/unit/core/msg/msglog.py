@@ -0,0 +1,152 @@
+import unittest
+import asyncio
+import tempfile
+import gzip
+import os
+from core.msg import msgabc, msgsvc, msgftr, msglog, msgtrf
+
+
+def _read(filename: str) -> str:
+    with open(filename, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+class TestCoreMsgLog(unittest.IsolatedAsyncioTestCase):
+
+    async def test_logfile_buffered(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(
+                filename, transformer=msgtrf.GetData(), flush_size=1024, flush_interval=0.05)
+            mailer = msgsvc.TaskMailer(subscriber)
+            mailer.start()
+            mailer.post('test', 'line', 'one')
+            mailer.post('test', 'line', 'two')
+            await asyncio.sleep(0.01)
+            with self.assertRaises(FileNotFoundError):
+                _read(filename)
+            await asyncio.sleep(0.1)
+            self.assertEqual('one\ntwo\n', _read(filename))
+            mailer.post('test', 'line', 'x' * 1024)
+            await asyncio.sleep(0.01)
+            self.assertEqual('one\ntwo\n' + 'x' * 1024 + '\n', _read(filename))
+            mailer.post('test', 'line', 'three')
+            await mailer.stop()
+            self.assertEqual('one\ntwo\n' + 'x' * 1024 + '\nthree\n', _read(filename))
+
+    async def test_logfile_flush_every_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(
+                filename, roll_filter=msgftr.NameIs('roll'), transformer=msgtrf.GetData(),
+                flush_size=0, flush_interval=60.0)
+            mailer = msgsvc.TaskMailer(subscriber)
+            mailer.start()
+            mailer.post('test', 'line', 'one')
+            await asyncio.sleep(0.01)
+            self.assertEqual('one\n', _read(filename))
+            mailer.post('test', 'roll', None)
+            mailer.post('test', 'line', 'two')
+            await asyncio.sleep(0.01)
+            self.assertEqual('two\n', _read(filename))
+            await mailer.stop()
+
+    async def test_logfile_bounded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(filename, transformer=msgtrf.GetData(), queue_size=2)
+            self.assertEqual((2, msgabc.OverflowPolicy.DROP_NEWEST), subscriber.queue_limits())
+            mailer = msgsvc.TaskMailer(subscriber)
+            mailer.start()
+            for i in range(5):
+                mailer.post('test', 'line', str(i))
+            self.assertFalse(mailer.blocked())
+            self.assertEqual(3, mailer.overflows())
+            await mailer.stop()
+            self.assertEqual('0\n1\n', _read(filename))
+
+    async def test_logfile_write_failure(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/missing/test.log'
+            subscriber = msglog.LogfileSubscriber(
+                filename, transformer=msgtrf.GetData(), flush_size=16, flush_interval=60.0)
+            mailer = msgsvc.TaskMailer(subscriber)
+            mailer.start()
+            mailer.post('test', 'line', 'one')
+            await asyncio.sleep(0.01)
+            flusher = subscriber._flusher
+            self.assertFalse(flusher.done())
+            mailer.post('test', 'line', 'x' * 16)
+            await asyncio.sleep(0.05)
+            self.assertTrue(flusher.done())
+            self.assertIsNone(subscriber._flusher)
+            self.assertTrue(mailer.expired())
+
+    async def test_logfile_rotation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(
+                filename, transformer=msgtrf.GetData(), flush_size=0, max_size=100, compress='gz', retain=2)
+            mailer = msgsvc.TaskMailer(subscriber)
+            mailer.start()
+            for i in range(8):
+                mailer.post('test', 'line', str(i) * 60)
+                await asyncio.sleep(0.01)
+            await mailer.stop()
+            names, lines = os.listdir(directory), []
+            self.assertEqual(2, len(names))
+            for name in names:
+                self.assertTrue(name.startswith('test.log.') and name.endswith('.gz'))
+                with gzip.open(directory + '/' + name, 'rt', encoding='utf-8') as file:
+                    lines.extend(file.read().split())
+            self.assertEqual([str(i) * 60 for i in range(4, 8)], sorted(lines))
+
+    async def test_logfile_index_search(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(filename, transformer=msgtrf.GetData(), index_interval=10.0)
+            messages = []
+            for created in (1000.0, 1005.0, 1012.0, 1025.0, 1031.0):
+                message = msgabc.Message('test', 'line', 'line at ' + str(int(created)))
+                setattr(message, '_created', created)
+                messages.append(message)
+            await subscriber.handle_batch(messages)
+            await subscriber.handle(msgabc.STOP)
+            self.assertEqual(['1000.000 0', '1012.000 26', '1025.000 39', '1031.000 52'],
+                             _read(filename + msglog.INDEX_SUFFIX).splitlines())
+            lines = await msglog.search_logfile(filename, 1015.0, 1026.0, None, 100)
+            self.assertEqual(['line at 1012', 'line at 1025'], lines)
+            lines = await msglog.search_logfile(filename, None, None, lambda line: line.endswith('5'), 100)
+            self.assertEqual(['line at 1005', 'line at 1025'], lines)
+            lines = await msglog.search_logfile(filename, 1020.0, None, None, 1)
+            self.assertEqual(['line at 1012'], lines)
+
+    async def test_logfile_search_rotated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(
+                filename, transformer=msgtrf.GetData(), flush_size=0, max_size=30, compress='gz', index_interval=10.0)
+            for created in (1000.0, 1012.0, 1025.0, 1031.0):
+                message = msgabc.Message('test', 'line', 'line at ' + str(int(created)))
+                setattr(message, '_created', created)
+                await subscriber.handle_batch((message,))
+            await subscriber.handle(msgabc.STOP)
+            names = sorted(os.listdir(directory))
+            self.assertEqual(4, len(names))
+            archive = directory + '/' + [name for name in names if name.endswith('.gz')][0]
+            self.assertTrue(os.path.isfile(archive[:-3] + msglog.INDEX_SUFFIX))
+            lines = await msglog.search_logfile(archive, None, None, None, 100)
+            self.assertEqual(['line at 1000', 'line at 1012', 'line at 1025'], lines)
+            lines = await msglog.search_logfile(archive, 1015.0, 1020.0, None, 100)
+            self.assertEqual(['line at 1012'], lines)
+            self.assertEqual(['line at 1031'], await msglog.search_logfile(filename, 1030.0, None, None, 100))
+
+    async def test_logfile_search_unindexed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = directory + '/test.log'
+            subscriber = msglog.LogfileSubscriber(filename, transformer=msgtrf.GetData())
+            await subscriber.handle_batch((msgabc.Message('test', 'line', 'one'),))
+            await subscriber.handle(msgabc.STOP)
+            self.assertEqual(['one'], await msglog.search_logfile(filename, None, None, None, 100))
+            with self.assertRaises(ValueError):
+                await msglog.search_logfile(filename, 9999999999.0, None, None, 100)
@@ -0,0 +1,168 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from asyncio import streams
+from core.msg import msgabc, msgftr, msgsvc, msgext, msgpipe
+
+
+class _CollectingMailer(msgabc.Mailer):
+
+    def __init__(self):
+        self.lines = []
+
+    def post(self, *vargs):
+        message = msgabc.Message.from_vargs(*vargs)
+        if message.name() == 'line':
+            self.lines.append(message.data())
+        return True
+
+
+class _RecordingMailer(msgabc.Mailer):
+
+    def __init__(self):
+        self.posted = []
+
+    def post(self, *vargs):
+        message = msgabc.Message.from_vargs(*vargs)
+        self.posted.append((message.name(), message.data()))
+        return True
+
+
+class _GatedSubscriber(msgabc.AbcSubscriber):
+
+    def __init__(self):
+        super().__init__(msgftr.NameIs('line'))
+        self.gate, self.count = asyncio.Event(), 0
+
+    async def handle(self, message):
+        await self.gate.wait()
+        self.count += 1
+        return None
+
+
+async def _read(chunks: tuple, chunk_size: int) -> list:
+    pipe, mailer = streams.StreamReader(), _CollectingMailer()
+    producer = msgpipe.PipeOutLineProducer(mailer, 'source', 'line', pipe, chunk_size=chunk_size)
+    for chunk in chunks:
+        pipe.feed_data(chunk)
+    pipe.feed_eof()
+    await producer.close()
+    return mailer.lines
+
+
+async def _wait_lines(mailer: _CollectingMailer, count: int):
+    for _ in range(200):
+        if len(mailer.lines) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+def _append(path: str, data: str, mode: str = 'a'):
+    with open(path, mode, encoding='utf-8') as file:
+        file.write(data)
+
+
+async def _tail(inotify: bool) -> list:
+    with tempfile.TemporaryDirectory() as directory:
+        path, mailer = directory + '/test.log', _CollectingMailer()
+        _append(path, ''.join(str(i) + '\n' for i in range(12)), 'w')
+        publisher = msgpipe.TailPublisher(mailer, 'source', 'line', path, inotify=inotify)
+        msgpipe.TailPublisher.POLL_INTERVAL = 0.02
+        try:
+            assert await publisher.start()
+            await _wait_lines(mailer, 10)
+            _append(path, 'append\npart')
+            await asyncio.sleep(0.05)
+            _append(path, 'ial\n')
+            await _wait_lines(mailer, 12)
+            _append(path, 'truncated\n', 'w')
+            await _wait_lines(mailer, 13)
+            os.rename(path, path + '.1')
+            _append(path, 'rotated\n', 'w')
+            await _wait_lines(mailer, 14)
+        finally:
+            msgpipe.TailPublisher.POLL_INTERVAL = 0.5
+            publisher.stop()
+        await asyncio.sleep(0.05)
+    return mailer.lines
+
+
+class TestCoreMsgPipe(unittest.IsolatedAsyncioTestCase):
+
+    async def test_chunked_matches_readline(self):
+        chunks = (b'first line\nsec', b'ond line\n\nthird ', b'line\npartial', b' tail')
+        expected = ['first line', 'second line', '', 'third line', 'partial tail']
+        self.assertEqual(expected, await _read(chunks, 0))
+        self.assertEqual(expected, await _read(chunks, 4))
+        self.assertEqual(expected, await _read(chunks, 65536))
+
+    async def test_chunked_long_line(self):
+        line = 'x' * (msgpipe.PipeOutLineProducer.LINE_LIMIT - 1) + 'é' + 'y' * 5000
+        lines = await _read((line.encode() + b'\nnext\n',), 4096)
+        self.assertEqual(3, len(lines))
+        self.assertEqual(msgpipe.PipeOutLineProducer.LINE_LIMIT - 1, len(lines[0]))
+        self.assertEqual(line, ''.join(lines[:2]))
+        self.assertEqual('next', lines[2])
+
+    async def test_backpressure(self):
+        mailer, subscriber, pipe = msgsvc.TaskMulticastMailer(), _GatedSubscriber(), streams.StreamReader()
+        mailer.start()
+        mailer.register(subscriber)
+        pipe.feed_data(b'line\n' * 1000)
+        pipe.feed_eof()
+        producer = msgpipe.PipeOutLineProducer(
+            mailer, 'source', 'line', pipe, chunk_size=64, high_water=100, low_water=20)
+        await asyncio.sleep(0.1)
+        self.assertLess(mailer.backlog(), 100 + msgext.Publisher.BACKLOG_INTERVAL)
+        subscriber.gate.set()
+        await producer.close()
+        await mailer.stop()
+        self.assertEqual(1000, subscriber.count)
+
+    async def test_line_limiter_collapse(self):
+        mailer = _RecordingMailer()
+        limiter = msgpipe.LineLimiter(mailer)
+        for line in ('a', 'b', 'b', 'b', 'c', 'c'):
+            limiter.post('source', 'line', line)
+        limiter.post('source', 'end', None)
+        self.assertEqual([
+            ('line', 'a'), ('line', 'b'),
+            ('line', 'Last line repeated 2 times'), (msgpipe.LineLimiter.SUPPRESSED, ('duplicate', 2)),
+            ('line', 'c'),
+            ('line', 'Last line repeated 1 times'), (msgpipe.LineLimiter.SUPPRESSED, ('duplicate', 1)),
+            ('end', None)], mailer.posted)
+
+    async def test_line_limiter_timed_flush(self):
+        mailer = _RecordingMailer()
+        limiter = msgpipe.LineLimiter(mailer, True, (('^WARN', 1.0), ), flush_interval=0.05)
+        for line in ('a', 'a', 'a', 'WARN 0', 'WARN 1'):
+            limiter.post('source', 'line', line)
+        self.assertEqual([('line', 'a'), ('line', 'Last line repeated 2 times'),
+                          (msgpipe.LineLimiter.SUPPRESSED, ('duplicate', 2)), ('line', 'WARN 0')], mailer.posted)
+        await asyncio.sleep(0.1)
+        self.assertEqual([
+            ('line', 'Suppressed 1 lines matching: ^WARN'), (msgpipe.LineLimiter.SUPPRESSED, ('^WARN', 1))],
+            mailer.posted[4:])
+        limiter.post('source', 'line', 'WARN 0')
+        limiter.post('source', 'line', 'WARN 0')
+        await asyncio.sleep(0.1)
+        self.assertEqual([('line', 'Last line repeated 2 times'), (msgpipe.LineLimiter.SUPPRESSED, ('duplicate', 2))],
+                         mailer.posted[6:])
+
+    async def test_line_limiter_rate(self):
+        mailer = _RecordingMailer()
+        limiter = msgpipe.LineLimiter(mailer, False, (('^WARN', 2.0), ))
+        for i in range(5):
+            limiter.post('source', 'line', 'WARN ' + str(i))
+        limiter.post('source', 'line', 'INFO')
+        limiter.post('source', 'end', None)
+        self.assertEqual([
+            ('line', 'WARN 0'), ('line', 'WARN 1'), ('line', 'INFO'),
+            ('line', 'Suppressed 3 lines matching: ^WARN'), (msgpipe.LineLimiter.SUPPRESSED, ('^WARN', 3)),
+            ('end', None)], mailer.posted)
+
+    async def test_tail_publisher(self):
+        expected = [str(i) for i in range(2, 12)] + ['append', 'partial', 'truncated', 'rotated']
+        self.assertEqual(expected, await _tail(True))
+        self.assertEqual(expected, await _tail(False))
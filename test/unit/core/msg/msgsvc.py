@@ -1,6 +1,7 @@
 import unittest
+import asyncio
 from core.util import util
-from core.msg import msgsvc, msgext, msgftr
+from core.msg import msgabc, msgsvc, msgext, msgftr
 
 
 class TestCoreMsg(unittest.IsolatedAsyncioTestCase):
@@ -37,3 +38,173 @@ class TestCoreMsg(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(message.source(), 'test-message')
         self.assertEqual(message.name(), 'mot')
         await mailer.stop()
+
+    async def test_indexed_multicast_mailer(self):
+        mailer = msgsvc.TaskMulticastMailer(indexed=True)
+        mailer.start()
+        c1, c2 = msgext.SingleCatcher(msgftr.NameIs('mot')), msgext.MultiCatcher(msgftr.AcceptAll(), msgftr.IsStop())
+        relay = msgsvc.TaskMailer(c2)
+        relay.start()
+        mailer.register(c1)
+        mailer.register(msgext.RelaySubscriber(relay, msgftr.NameIs('mot')))
+        mailer.post('test-message', 'other')
+        mailer.post('test-message', 'mot')
+        self.assertEqual('mot', (await c1.get()).name())
+        await mailer.stop()
+        await relay.stop()
+        self.assertEqual('mot', util.single(await c2.get()).name())
+
+    async def test_batch_mailer(self):
+        subscriber = _BatchSubscriber()
+        mailer = msgsvc.TaskMailer(subscriber)
+        mailer.start()
+        for i in range(5):
+            mailer.post('source', 'test-message', i)
+        await mailer.stop()
+        self.assertEqual([[0, 1, 2], [3, 4]], subscriber.batches)
+        self.assertTrue(subscriber.stopped)
+
+    async def test_bounded_mailer(self):
+        policies = msgabc.OverflowPolicy
+        expected = {policies.DROP_OLDEST: [2, 3, 4], policies.DROP_NEWEST: [0, 1, 2], policies.COALESCE: [1, 2, 4]}
+        for policy, data in expected.items():
+            catcher = msgext.MultiCatcher(msgftr.AcceptAll(), msgftr.IsStop())
+            mailer = msgsvc.TaskMailer(catcher, 3, policy)
+            mailer.start()
+            for i, name in enumerate(('a', 'b', 'c', 'a', 'a')):
+                mailer.post('source', name, i)
+            self.assertEqual(2, mailer.overflows())
+            await mailer.stop()
+            self.assertEqual(data, [m.data() for m in await catcher.get()])
+
+    async def test_drop_oldest_keeps_stop(self):
+        queue = msgsvc._MailerQueue()
+        queue.put_nowait(msgabc.Message('source', 'a'))
+        queue.put_nowait(msgabc.STOP)
+        queue.drop_oldest()
+        queue.drop_oldest()
+        self.assertEqual(1, queue.qsize())
+        self.assertIs(msgabc.STOP, queue.get_nowait())
+        self.assertTrue(queue.empty())
+
+    async def test_bounded_mailer_block(self):
+        catcher = msgext.MultiCatcher(msgftr.AcceptAll(), msgftr.IsStop())
+        mailer = msgsvc.TaskMailer(catcher, 1)
+        mailer.start()
+        mailer.post('source', 'a', 0)
+        mailer.post('source', 'a', 1)
+        self.assertTrue(mailer.blocked())
+        await mailer.drain()
+        self.assertFalse(mailer.blocked())
+        await mailer.stop()
+        self.assertEqual([0, 1], [m.data() for m in await catcher.get()])
+
+    async def test_correlated_request(self):
+        mailer = msgsvc.TaskMulticastMailer(indexed=True)
+        mailer.start()
+        mailer.register(msgext.SetGetSubscriber(mailer, 'get', 'set', 'response', 'value'))
+        response = await msgext.SynchronousMessenger(mailer).request('source', 'get')
+        self.assertEqual('value', response.data())
+        self.assertEqual(1, len(mailer._subscriber.mailers()))
+        self.assertEqual(0, len(mailer._subscriber.replies()))
+        with self.assertRaises(asyncio.TimeoutError):
+            await msgext.SynchronousMessenger(mailer, timeout=0.01).request('source', 'unanswered')
+        self.assertEqual(0, len(mailer._subscriber.replies()))
+        await mailer.stop()
+
+    async def test_sweep_expired_mailers(self):
+        mailer = msgsvc.TaskMulticastMailer(indexed=True)
+        mailer.start()
+        catcher = msgext.SingleCatcher(msgftr.NameIs('never'), 0.01)
+        mailer.register(catcher)
+        mailer.register(msgext.SingleCatcher(msgftr.NameIs('other')))
+        with self.assertRaises(asyncio.TimeoutError):
+            await catcher.get()
+        self.assertEqual((2, 2, 0), mailer.lifecycle())
+        self.assertEqual(1, mailer.sweep())
+        self.assertEqual((1, 2, 1), mailer.lifecycle())
+        await mailer.stop()
+
+    async def test_instrumented_mailer(self):
+        mailer = msgsvc.TaskMulticastMailer(indexed=True)
+        mailer.instrument()
+        mailer.start()
+        catcher = msgext.MultiCatcher(msgftr.NameIs('line'), msgftr.NameIs('end'))
+        mailer.register(catcher)
+        for i in range(3):
+            mailer.post('source', 'line', i)
+        stale = msgabc.Message('source', 'line', 3)
+        setattr(stale, '_created', stale.created() - 1000.0)  # Wait is measured in the queue, not since creation
+        mailer.post(stale)
+        mailer.post('source', 'end')
+        await catcher.get()
+        depth, stats = mailer.stats()['core.msg.msgext.MultiCatcher']
+        self.assertEqual(0, depth)
+        self.assertEqual(5, stats.wait().buckets()[-1][1])
+        self.assertLess(stats.wait().sum(), 1.0)
+        self.assertEqual(5, stats.handle().buckets()[-1][1])
+        await mailer.stop()
+
+    async def test_priority_lane(self):
+        subscriber = _NamesSubscriber('line', 'control')
+        mailer = msgsvc.TaskMailer(subscriber, priority=msgftr.NameIs('control'))
+        mailer.start()
+        for name in ('line', 'line', 'control', 'line', 'control'):
+            mailer.post('source', name)
+        await mailer.stop()
+        self.assertEqual(['control', 'control', 'line', 'line', 'line'], subscriber.received)
+
+    async def test_priority_ahead_of_dispatcher_backlog(self):
+        for indexed in (False, True):
+            mailer = msgsvc.TaskMulticastMailer(indexed=indexed, priority=msgftr.NameIs('control'))
+            mailer.start()
+            control = _NamesSubscriber('control')
+            catcher = msgext.MultiCatcher(msgftr.NameIn('line', 'control'), msgftr.IsStop())
+            control_mailer = mailer.register(control)
+            mailer.register(catcher)
+            for _ in range(100):
+                mailer.post('source', 'line')
+            mailer.post('source', 'control')
+            self.assertEqual(1, control_mailer.qsize())
+            await asyncio.sleep(0.01)
+            self.assertEqual(['control'], control.received)
+            await mailer.stop()
+            self.assertEqual(['line'] * 100 + ['control'], [m.name() for m in await catcher.get()])
+
+    async def test_no_priority_lane_when_accepting_all(self):
+        catcher = msgext.MultiCatcher(msgftr.NameIn('line', 'control'), msgftr.IsStop())
+        mailer = msgsvc.TaskMailer(catcher, priority=msgftr.NameIs('control'))
+        mailer.start()
+        for name in ('line', 'control', 'line'):
+            mailer.post('source', name)
+        await mailer.stop()
+        self.assertEqual(['line', 'control', 'line'], [m.name() for m in await catcher.get()])
+
+
+class _NamesSubscriber(msgabc.AbcSubscriber):
+
+    def __init__(self, *names):
+        super().__init__(msgftr.NameIn(*names) if len(names) > 1 else msgftr.NameIs(names[0]))
+        self.received = []
+
+    def handle(self, message):
+        self.received.append(message.name())
+        return None
+
+
+class _BatchSubscriber(msgabc.AbcSubscriber, msgabc.BatchHandler):
+
+    def __init__(self):
+        super().__init__(msgftr.Or(msgftr.NameIs('test-message'), msgftr.IsStop()))
+        self.batches, self.stopped = [], False
+
+    def batch_size(self):
+        return 3
+
+    def handle(self, message):
+        self.stopped = message is msgabc.STOP
+        return True if self.stopped else None
+
+    def handle_batch(self, messages):
+        self.batches.append([o.data() for o in messages])
+        return None
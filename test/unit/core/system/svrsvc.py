@@ -0,0 +1,18 @@
+import unittest
+from core.msgc import sc
+from core.context import contextsvc
+from core.system import svrsvc
+
+
+class TestCoreSystemSvrSvc(unittest.IsolatedAsyncioTestCase):
+
+    async def test_status_after_notify(self):
+        context = contextsvc.Context({'identity': 'test'})
+        context.start()
+        context.register(svrsvc.ServerStatus(context))
+        svrsvc.ServerStatus.notify_state(context, self, sc.STARTED)
+        svrsvc.ServerStatus.notify_running(context, self, True)
+        status = await svrsvc.ServerStatus.get_status(context, self)
+        self.assertEqual(sc.STARTED, status['state'])
+        self.assertTrue(status['running'])
+        await context.shutdown()